@@ -3,7 +3,7 @@ from flask import jsonify
 from core.parts.preprocessing.preprocessing import prepareData
 from core.parts.processing.indexes import prepareHurstIndex, preparePrediction
 from core.tools import collectPlots
-from wavelet_research.waveletMaker import countWaveletTransform, flatWaveletTransform
+from wavelet_research.waveletMaker import countWaveletTransform, flatWaveletTransform, waveletFeatures
 
 import pandas as pd
 import json
@@ -19,7 +19,9 @@ def analyse(currency, frequency, startDate, endDate):
     transforms = countWaveletTransform(data["date"], data["open"])
     flattenTransforms = flatWaveletTransform(transforms)
 
-    tsDf = pd.concat([dataFrame, pd.DataFrame(flattenTransforms)], axis=1)
+    features = waveletFeatures(transforms, index=dataFrame.index)
+
+    tsDf = pd.concat([dataFrame, pd.DataFrame(flattenTransforms), features], axis=1)
 
     recommendation = preparePrediction(flattenTransforms["Paul"])
     waveletDetails = collectPlots(transforms)
@@ -0,0 +1,116 @@
+import numpy as np
+
+from core.parts.processing.dwt import filter_bank
+
+__all__ = ['StreamingDenoiser']
+
+
+class StreamingDenoiser(object):
+    """Wavelet threshold denoising of a live series, one tick at a
+    time, without the lag of a long moving average.
+
+    The series is split with a causal a trous (stationary) transform:
+    c_0 = x and, for levels j = 1 ... level,
+
+        c_j(t) = sum_l g_l c_(j-1)(t - 2^(j-1) l)
+        w_j(t) = c_(j-1)(t) - c_j(t)
+
+    with g the lowpass decomposition filter of the pywt wavelet,
+    normalised to unit sum. Then x(t) = c_level(t) + sum_j w_j(t)
+    exactly, so the denoised value is available at t itself: the
+    smooth plus the thresholded details.
+
+    Each level keeps a ring buffer of the (len(g) - 1) 2^(j-1) + 1
+    last values of c_(j-1), about 2^level samples in all, so an update
+    costs O(level * len(g)) whatever the length of the history.
+
+    Arguments:
+        wavelet - pywt wavelet name
+        level - number of detail levels
+        mode - 'soft' or 'hard' thresholding
+        k - threshold, in noise standard deviations at each level
+        sigma - standard deviation of the noise, or None to estimate
+                it on line from the finest details
+        halflife - in ticks, of the running noise estimate
+    """
+    modes = ('soft', 'hard')
+
+    def __init__(self, wavelet='haar', level=3, mode='soft', k=3.,
+                 sigma=None, halflife=256):
+        if mode not in self.modes:
+            raise ValueError('mode must be one of {}'.format(self.modes))
+        g = np.asarray(filter_bank(wavelet).dec_lo, dtype=float)
+        self.g = g / g.sum()
+        self.level = level
+        self.mode = mode
+        self.k = k
+        self.sigma = sigma
+        self._decay = 0.5 ** (1. / halflife)
+        self._mean_abs = 0.
+
+        taps = np.arange(self.g.size)
+        self._sizes = [(self.g.size - 1) * 2 ** j + 1 for j in range(level)]
+        self._taps = [2 ** j * taps for j in range(level)]
+        self._buffers = None
+        self._position = 0
+        # coefficients of the last update
+        self.details = None
+        self.smooth = None
+        self.noise_scale = self._noise_scale()
+
+    def _noise_scale(self):
+        """Standard deviation of w_j for unit white noise, from the
+        equivalent filter of each level."""
+        scale = np.empty(self.level)
+        c = np.array([1.])
+        for j in range(self.level):
+            up = np.zeros((self.g.size - 1) * 2 ** j + 1)
+            up[::2 ** j] = self.g
+            smooth = np.convolve(c, up)
+            detail = -smooth
+            detail[:c.size] += c
+            scale[j] = np.sqrt(np.sum(detail ** 2))
+            c = smooth
+        return scale
+
+    @property
+    def noise_sigma(self):
+        """Current estimate of the standard deviation of the noise."""
+        if self.sigma is not None:
+            return self.sigma
+        return self._mean_abs * np.sqrt(np.pi / 2) / self.noise_scale[0]
+
+    def _threshold(self, w, threshold):
+        if self.mode == 'soft':
+            return np.sign(w) * np.maximum(np.abs(w) - threshold, 0)
+        return np.where(np.abs(w) > threshold, w, 0)
+
+    def update(self, value):
+        """Add one sample; return its denoised value."""
+        if self._buffers is None:
+            # start from a flat history at the first value
+            self._buffers = [np.full(size, float(value))
+                             for size in self._sizes]
+        t = self._position
+        self._position += 1
+
+        details = np.empty(self.level)
+        c = float(value)
+        for j in range(self.level):
+            buf = self._buffers[j]
+            buf[t % buf.size] = c
+            smooth = np.dot(self.g, buf[(t - self._taps[j]) % buf.size])
+            details[j] = c - smooth
+            c = smooth
+
+        if self.sigma is None:
+            self._mean_abs = (self._decay * self._mean_abs
+                              + (1 - self._decay) * abs(details[0]))
+        threshold = self.k * self.noise_sigma * self.noise_scale
+        self.details = details
+        self.smooth = c
+        return c + self._threshold(details, threshold).sum()
+
+    def extend(self, values):
+        """Add samples in order; return their denoised values."""
+        return np.array([self.update(value) for value in values])
@@ -0,0 +1,140 @@
+from functools import lru_cache
+
+import numpy as np
+import pywt
+
+from core.parts.wavelets.kernels import kernel_bank
+
+__all__ = ['filter_bank', 'dwt', 'dwt_smooth', 'dwt_mra', 'modwt',
+           'modwt_mra']
+
+# periodic extension, so that the coefficients of a level halve its
+# length exactly and the reconstruction has the original length
+default_mode = 'periodization'
+
+
+@lru_cache(maxsize=None)
+def filter_bank(name):
+    """pywt.Wavelet of the given name, created once per name."""
+    return pywt.Wavelet(name)
+
+
+def _max_level(N, name):
+    return pywt.dwt_max_level(N, filter_bank(name).dec_len)
+
+
+def dwt(data, wavelet='db1', level=None, mode=default_mode):
+    """Multi level discrete wavelet transform along the last axis of
+    `data`, which can hold many series, one per row.
+
+    Returns [cA_level, cD_level, ..., cD_1] as pywt.wavedec.
+    """
+    data = np.asarray(data, dtype=float)
+    if level is None:
+        level = _max_level(data.shape[-1], wavelet)
+    return pywt.wavedec(data, filter_bank(wavelet), mode=mode, level=level,
+                        axis=-1)
+
+
+def _reconstruct(coeffs, keep, wavelet, mode, N):
+    """Reconstruction from the coefficients with index in `keep`, the
+    others zeroed, cut to the original length N."""
+    coeffs = [c if i in keep else np.zeros_like(c)
+              for i, c in enumerate(coeffs)]
+    return pywt.waverec(coeffs, filter_bank(wavelet), mode=mode,
+                        axis=-1)[..., :N]
+
+
+def dwt_smooth(data, wavelet='db1', level=1, mode=default_mode):
+    """Approximation of `data` at `level`: the reconstruction from the
+    approximation coefficients alone, at the original length. Rows of
+    `data` are smoothed together."""
+    data = np.asarray(data, dtype=float)
+    coeffs = dwt(data, wavelet, level, mode)
+    return _reconstruct(coeffs, {0}, wavelet, mode, data.shape[-1])
+
+
+def dwt_mra(data, wavelet='db1', level=None, mode=default_mode):
+    """Multiresolution analysis of `data`: its details D_1 ... D_level
+    and smooth S_level, each at the original length, stacked on a new
+    second last axis, (..., level + 1, N). They sum to `data`."""
+    data = np.asarray(data, dtype=float)
+    N = data.shape[-1]
+    coeffs = dwt(data, wavelet, level, mode)
+    level = len(coeffs) - 1
+    # coeffs[i] is the detail of level `level + 1 - i`
+    parts = [_reconstruct(coeffs, {level + 1 - j}, wavelet, mode, N)
+             for j in range(1, level + 1)]
+    parts.append(_reconstruct(coeffs, {0}, wavelet, mode, N))
+    return np.stack(parts, axis=-2)
+
+
+def _modwt_transfer(wavelet, N, level):
+    """Transfer functions of the MODWT wavelet filters of levels
+    1 ... level and of the scaling filter of `level`, (level + 1, N),
+    over the fourier frequencies of N samples. Kept in the kernel
+    bank."""
+    def compute():
+        bank = filter_bank(wavelet)
+        # MODWT filters are the DWT filters rescaled by 1 / sqrt(2)
+        h = np.asarray(bank.dec_hi) / 2 ** .5
+        g = np.asarray(bank.dec_lo) / 2 ** .5
+        # G(2^k f) and H(2^k f) for k = 0 ... level - 1 are the ffts of
+        # the filters upsampled by 2^k (the a trous filters), wrapped
+        # around N samples; one (N,) row per level
+        def upsampled(coefficients, k):
+            taps = np.zeros(N)
+            np.add.at(taps, (2 ** k * np.arange(coefficients.size)) % N,
+                      coefficients)
+            return np.fft.fft(taps)
+
+        transfer = np.empty((level + 1, N), dtype=complex)
+        # level j: H(2^(j-1) f) times the product of the G below it
+        lowpass = np.ones(N, dtype=complex)
+        for k in range(level):
+            transfer[k] = upsampled(h, k) * lowpass
+            lowpass *= upsampled(g, k)
+        transfer[level] = lowpass
+        return transfer
+
+    return kernel_bank.get(('modwt', wavelet, N, level), compute)
+
+
+def modwt(data, wavelet='db1', level=None):
+    """Maximal overlap (shift invariant) discrete wavelet transform of
+    `data` along its last axis, with periodic boundaries (Percival and
+    Walden 2000). Any length N is allowed and rows are transformed
+    together, with one fft.
+
+    Returns (..., level + 1, N): the wavelet coefficients of levels 1
+    ... level, then the scaling coefficients of `level`. Their energy
+    is that of `data`.
+    """
+    data = np.asarray(data, dtype=float)
+    N = data.shape[-1]
+    if level is None:
+        level = _max_level(N, wavelet)
+    transfer = _modwt_transfer(wavelet, N, level)
+    X = np.fft.fft(data, axis=-1)
+    # one level at a time, so that no complex (level + 1, N) product
+    # is held
+    out = np.empty(data.shape[:-1] + (level + 1, N))
+    for j, row in enumerate(transfer):
+        out[..., j, :] = np.fft.ifft(X * row, axis=-1).real
+    return out
+
+
+def modwt_mra(data, wavelet='db1', level=None):
+    """Multiresolution analysis from the MODWT: details D_1 ... D_level
+    and smooth S_level, (..., level + 1, N), zero phase and summing to
+    `data`."""
+    data = np.asarray(data, dtype=float)
+    N = data.shape[-1]
+    if level is None:
+        level = _max_level(N, wavelet)
+    transfer = _modwt_transfer(wavelet, N, level)
+    X = np.fft.fft(data, axis=-1)
+    out = np.empty(data.shape[:-1] + (level + 1, N))
+    for j, row in enumerate(transfer):
+        out[..., j, :] = np.fft.ifft(X * np.abs(row) ** 2, axis=-1).real
+    return out
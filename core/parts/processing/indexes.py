@@ -1,32 +1,15 @@
 import copy
 
-import nolds
-from numpy import log, polyfit, sqrt, std, subtract
-
+from core.parts.processing.lyapunov import rolling_lyapunov
 from core.parts.processing.prediction import predictNextValue
+from core.parts.processing.rolling import rolling_dfa, rolling_hurst, \
+    rolling_wavelet_hurst
 from core.tools import *
 
 
-def hurst(ts):
-    # Create the range of lag values
-    window_len = 30
-    hurst_ts = np.zeros(30, dtype=np.int)
-    for tail in range(window_len, len(ts)):
-        lags = range(1, window_len // 2)
-        # print(lags)
-        # Calculate the array of the variances of the lagged differences
-        cur_ts = ts[max(1, tail - window_len):tail]
-        # cur_ts = ts[:tail]
-        tau = [sqrt(std(subtract(cur_ts[lag:], cur_ts[:-lag]))) for lag in lags]
-
-        # print("Time series slice len: ",len(cur_ts),len(tau),lags)
-        # Use a linear fit to estimate the Hurst Exponent
-        poly = polyfit(log(lags), log(tau), 1)
-
-        # Return the Hurst exponent from the polyfit output
-        # print(poly[0]*2.0)
-        hurst_ts = np.append(hurst_ts, poly[0] * 2.0)
-    return hurst_ts
+def hurst(ts, window_len=30):
+    # rolling Hurst exponent over windows of window_len, see rolling_hurst
+    return rolling_hurst(ts, window_len)
 
 
 # True = buy, False = sell
@@ -46,9 +29,21 @@ def preparePrediction(data):
     return proportion >= 1
 
 
-def prepareHurstIndex(timestamp, value):
+# engines of prepareHurstIndex: rolling exponent over windows of 70
+hurst_engines = {
+    "dfa": lambda value: newHurst(value),
+    "rs": lambda value: hurst(value, 70),
+    # wavelet variance slope, the cheapest on long series
+    "wavelet": lambda value: rolling_wavelet_hurst(value, 70),
+}
+
+
+def prepareHurstIndex(timestamp, value, engine="dfa"):
+    if engine not in hurst_engines:
+        raise ValueError(
+            "engine must be one of {}".format(sorted(hurst_engines)))
     columns = ["date", "value"]
-    return dict(zip(columns, [timestamp, newHurst(value)]))
+    return dict(zip(columns, [timestamp, hurst_engines[engine](value)]))
 
 
 def calculateHurst(date, x, folder_name):
@@ -56,44 +51,16 @@ def calculateHurst(date, x, folder_name):
     showPlot(date[-len(hurst_res):], hurst_res, folder_name)
 
 
-def lyapunov(series):
-    from math import log
-
-    def d(series, i, j):
-        return abs(series[i] - series[j])
-
-    N = len(series)
-    eps = 10
-    dlist = [[] for _ in range(N)]
-    resultlist = []
-    for i in range(N):
-        ilist = []
-        for j in range(i + 1, N):
-            # jlist = []
-            if d(series, i, j) < eps:
-                for k in range(min(N - i, N - j)):
-                    delta = d(series, i + k, j + k)
-                    # print(delta)
-                    if delta > 0:
-                        dlist[k].append(log(delta))
-                        # jlist.append(delta)
-                        #     if len(jlist):
-                        #         ilist.append(sum(jlist) / len(jlist))
-                        # if len(ilist):
-                        #     resultlist.append(sum(ilist) / len(ilist))
-                        # else:
-                        #     resultlist.append(0)
-                        # print("result")
-    # return (resultlist)
-    # print(len(dlist))
-    return ([sum(dl) / len(dl) if len(dl) else 0 for dl in dlist])
-    # for i in range(len(dlist)):
-    #     if len(dlist[i]):
-    #         print >> f, i, sum(dlist[i]) / len(dlist[i])
-
-
-def calculateLyapunov(date, x, folder_name):
-    showPlot(date, lyapunov(x), folder_name)
+def lyapunov(series, window_len=250, step=1):
+    # rolling largest Lyapunov exponent over windows of window_len, see
+    # rolling_lyapunov
+    return rolling_lyapunov(series, window_len, step=step)
+
+
+def calculateLyapunov(date, x, folder_name, step=20):
+    # one Rosenstein fit every `step` samples keeps the plot within a
+    # request
+    showPlot(date, lyapunov(x, step=step), folder_name)
 
 
 # simple moving average: ts - time series vector, moving_average_width - width
@@ -175,12 +142,6 @@ def ExpMovingAverage(values, window):
     return a
 
 
-def newHurst(ts):
-    # Create the range of lag values
-    window_len = 70
-    hurst_ts = np.zeros(window_len, dtype=np.int)
-    for tail in range(window_len, len(ts)):
-        cur_ts = ts[max(1, tail - window_len):tail]
-
-        hurst_ts = np.append(hurst_ts, nolds.dfa(cur_ts))
-    return hurst_ts
+def newHurst(ts, window_len=70):
+    # rolling DFA exponent over windows of window_len, see rolling_dfa
+    return rolling_dfa(ts, window_len)
@@ -0,0 +1,176 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+from core.parts.wavelets.executor import get_policy
+
+__all__ = ['delay_embedding', 'mean_period', 'divergence', 'lyapunov_r',
+           'rolling_lyapunov']
+
+
+def delay_embedding(x, emb_dim=10, lag=1):
+    """(M, emb_dim) delay vectors [x[i], x[i + lag], ...,
+    x[i + (emb_dim - 1) lag]] of `x`, a read only view without copy."""
+    x = np.ascontiguousarray(x, dtype=float)
+    M = x.size - (emb_dim - 1) * lag
+    if M < 1:
+        raise ValueError('cannot embed {} samples with emb_dim {} and lag {}'
+                         .format(x.size, emb_dim, lag))
+    return np.lib.stride_tricks.as_strided(
+        x, shape=(M, emb_dim), strides=(x.strides[0], lag * x.strides[0]),
+        writeable=False)
+
+
+def mean_period(x):
+    """Mean period of `x` in samples, one over its mean frequency
+    weighted by the power spectrum, at most a quarter of its length
+    (as nolds.lyap_r)."""
+    x = np.asarray(x, dtype=float)
+    n = x.size
+    power = np.abs(np.fft.rfft(x, 2 * n - 1))[1:] ** 2
+    frequency = np.fft.rfftfreq(2 * n - 1)[1:]
+    mean = np.sum(frequency * power) / np.sum(power)
+    return int(min(np.ceil(1. / mean), n // 4))
+
+
+def _neighbours(orbit, min_tsep, brute_force=1024):
+    """Index of the nearest neighbour of each vector of `orbit` more
+    than min_tsep samples away (the Theiler window).
+
+    Up to `brute_force` vectors, the distances of all pairs are one
+    matrix product. Above, neighbours come from a KD-tree: only
+    2 min_tsep + 1 vectors are excluded for each, so the 2 min_tsep + 2
+    nearest always hold a valid neighbour; fewer are asked first and
+    more only for the vectors that did not find one.
+    """
+    n = len(orbit)
+    if n < 2 * min_tsep + 2:
+        raise ValueError('{} trajectories are too few for min_tsep {}, at '
+                         'least {} are needed'
+                         .format(n, min_tsep, 2 * min_tsep + 2))
+    if n <= brute_force:
+        squares = np.einsum('ij,ij->i', orbit, orbit)
+        distance = squares[:, None] + squares[None, :] - 2 * orbit.dot(
+            orbit.T)
+        i = np.arange(n)
+        distance[np.abs(i[:, None] - i[None, :]) <= min_tsep] = np.inf
+        return distance.argmin(axis=1)
+
+    tree = cKDTree(orbit)
+    nearest = np.empty(n, dtype=int)
+    todo = np.arange(n)
+    k = min(8, 2 * min_tsep + 2)
+    while todo.size:
+        _, index = tree.query(orbit[todo], k=k)
+        index = index.reshape(todo.size, k)
+        valid = np.abs(index - todo[:, None]) > min_tsep
+        found = valid.any(axis=1)
+        # query returns neighbours by increasing distance
+        nearest[todo[found]] = index[found, valid[found].argmax(axis=1)]
+        todo = todo[~found]
+        k = min(2 * k, 2 * min_tsep + 2)
+    return nearest
+
+
+def divergence(x, emb_dim=10, lag=1, min_tsep=None, trajectory_len=20):
+    """Mean log distance between the trajectories of nearest neighbours,
+    after k = 0 ... trajectory_len - 1 steps (Rosenstein et al. 1993).
+
+    Each delay vector that can be followed for trajectory_len steps is
+    paired with its nearest neighbour outside the Theiler window
+    |i - j| <= min_tsep. Neighbours of long series come from a KD-tree,
+    O(M log M) for M vectors on smooth orbits, and the distances of all
+    pairs at each step are one vectorized norm; pairs at zero distance
+    are left out of the mean.
+
+    Arguments:
+        x - the series
+        emb_dim - embedding dimension
+        lag - delay between the elements of a vector
+        min_tsep - Theiler window in samples (default the mean period)
+        trajectory_len - number of steps followed
+
+    Returns (trajectory_len,) array, -inf where all distances are zero.
+    """
+    x = np.asarray(x, dtype=float)
+    if min_tsep is None:
+        min_tsep = mean_period(x)
+    orbit = delay_embedding(x, emb_dim, lag)
+    n = len(orbit) - trajectory_len + 1
+    if n < 1:
+        raise ValueError('{} samples are too few to follow trajectories of '
+                         '{} steps'.format(x.size, trajectory_len))
+    i = np.arange(n)
+    j = _neighbours(orbit[:n], min_tsep)
+
+    curve = np.empty(trajectory_len)
+    for k in range(trajectory_len):
+        distance = np.linalg.norm(orbit[i + k] - orbit[j + k], axis=1)
+        distance = distance[distance > 0]
+        curve[k] = np.log(distance).mean() if distance.size else -np.inf
+    return curve
+
+
+def _slope(curve, dt):
+    k = np.flatnonzero(np.isfinite(curve))
+    if k.size < 2:
+        return -np.inf
+    return np.polyfit(k, curve[k], 1)[0] / dt
+
+
+def lyapunov_r(x, emb_dim=10, lag=1, min_tsep=None, trajectory_len=20,
+               dt=1.):
+    """Largest Lyapunov exponent of `x` by the method of Rosenstein et
+    al.: the slope of the least squares line through the divergence
+    curve, per unit of time dt between samples. Equal to
+    nolds.lyap_r(x, emb_dim, lag, min_tsep, tau=dt, trajectory_len,
+    fit='poly') up to ties and precision, in O(N) memory instead of
+    O(N^2). The time depends on the series: the KD-tree search is fast
+    on smooth orbits (about 1 s for a 50k random walk) but degrades
+    towards a scan of all pairs when the delay vectors fill the
+    embedding space, as for white noise (about 11 s for 50k samples
+    in 10 dimensions). See divergence for the arguments.
+    """
+    return _slope(divergence(x, emb_dim, lag, min_tsep, trajectory_len),
+                  dt)
+
+
+def rolling_lyapunov(ts, window=250, emb_dim=10, lag=1, min_tsep=None,
+                     trajectory_len=20, dt=1., step=1, out=None):
+    """lyapunov_r of the windows of `ts`.
+
+    Each window is one neighbour search over its delay vectors; the
+    windows are spread over the workers of the execution policy. With
+    step > 1 only every step-th window is estimated and its value held
+    until the next one, so a live series can be updated every `step`
+    ticks.
+
+    Arguments:
+        ts - the series
+        window - window length
+        step - samples between estimated windows
+        out - preallocated output of the length of ts
+        others - as lyapunov_r; min_tsep None takes the mean period of
+                 each window
+
+    Returns an array of the length of ts: zero for the first `window`
+    samples, then at index i the exponent of the last estimated window
+    ts[s - window:s], s <= i.
+    """
+    x = np.asarray(ts, dtype=float)
+    N = x.size
+    if out is None:
+        out = np.zeros(N)
+    else:
+        out[:window] = 0
+    if N <= window:
+        return out
+
+    stops = np.arange(window, N, step)
+
+    def estimate(stop):
+        return lyapunov_r(x[stop - window:stop], emb_dim, lag, min_tsep,
+                          trajectory_len, dt)
+
+    values = np.array(get_policy().map(estimate, stops))
+    out[window:] = np.repeat(values, np.diff(np.append(stops, N)))
+    return out
@@ -0,0 +1,361 @@
+import numpy as np
+
+from core.parts.processing.dwt import filter_bank, modwt
+
+__all__ = ['rolling_hurst', 'rolling_dfa', 'dfa_box_sizes', 'hurst_surface',
+           'wavelet_hurst', 'rolling_wavelet_hurst']
+
+
+def _cumulative(values):
+    """Cumulative sum with a leading zero, so that the sum of
+    values[a:b] is c[b] - c[a]."""
+    return np.concatenate([[0.], np.cumsum(values)])
+
+
+def _slope_projection(x):
+    """Row vector p such that p.dot(y) is the least squares slope of y
+    on x, for a design x that is fixed across windows."""
+    centred = np.asarray(x, dtype=float) - np.mean(x)
+    return centred / centred.dot(centred)
+
+
+def dfa_box_sizes(window):
+    """Box sizes nolds.dfa uses by default for a series of length
+    `window`."""
+    if window > 70:
+        # logarithmic_n(4, 0.1 * window, 1.2)
+        count = int(np.floor(np.log(0.1 * window / 4) / np.log(1.2)))
+        sizes = [4]
+        for i in range(count + 1):
+            n = int(np.floor(4 * 1.2 ** i))
+            if n > sizes[-1]:
+                sizes.append(n)
+        return np.array(sizes)
+    elif window > 10:
+        return np.arange(4, 10)
+    return np.array([window - 2, window - 1])
+
+
+def _check_lags(window, lags):
+    # the default lags 1 ... window // 2 - 1 need two to fit a slope
+    if lags is None and window < 6:
+        raise ValueError('window must be at least 6 with the default lags, '
+                         'got {}'.format(window))
+
+
+class _LagStatistics(object):
+    """Running sums of the lagged differences x[t + lag] - x[t] of a
+    stretch of series, and their squares, computed once per lag and
+    shared by every window length."""
+    def __init__(self, x):
+        self.x = x
+        self._sums = {}
+
+    def _lag(self, lag):
+        if lag not in self._sums:
+            d = self.x[lag:] - self.x[:-lag]
+            self._sums[lag] = (_cumulative(d), _cumulative(d * d))
+        return self._sums[lag]
+
+    def exponents(self, window, first, count, lags=None):
+        """Hurst exponents of the `count` windows x[s:s + window], s
+        from `first`: twice the slope of log tau on log lag, with tau
+        the square root of the standard deviation of the lagged
+        differences over the window."""
+        if lags is None:
+            lags = np.arange(1, window // 2)
+        starts = first + np.arange(count)
+        log_tau = np.empty((len(lags), count))
+        for row, lag in enumerate(lags):
+            c1, c2 = self._lag(lag)
+            # differences inside the window
+            stops = starts + window - lag
+            n = window - lag
+            mean = (c1[stops] - c1[starts]) / n
+            var = (c2[stops] - c2[starts]) / n - mean ** 2
+            # tau = std ** .5
+            with np.errstate(divide='ignore'):
+                log_tau[row] = np.log(np.maximum(var, 0)) / 4
+        return 2 * _slope_projection(np.log(lags)).dot(log_tau)
+
+
+class _BoxStatistics(object):
+    """Detrended fluctuations of the boxes of the DFA profile of a
+    stretch of series, computed once per box size and shared by every
+    window length."""
+    def __init__(self, x):
+        self._profile = np.cumsum(x - x.mean())
+        self._fluctuations = {}
+
+    def fluctuations(self, n):
+        """Mean square residual of the least squares line through each
+        box of n samples of the profile, for every box start.
+
+        Each is found from cumulative sums of t, t^2, y, ty and y^2
+        (the sums of t and t^2 over a box are fixed, with t counted
+        from the box start). The sums run over blocks of 8 n box
+        starts, each with its own line removed, which the residuals
+        do not depend on; this keeps the sums small, and so
+        accurate, whatever the length of the series.
+        """
+        if n not in self._fluctuations:
+            y = self._profile
+            count = y.size - n + 1
+            B = 8 * n
+            blocks = -(-count // B)
+            # overlapping blocks of the profile, (blocks, B + n - 1)
+            index = np.minimum(np.arange(blocks)[:, None] * B
+                               + np.arange(B + n - 1), y.size - 1)
+            segments = y[index]
+            # residuals at the rounding level of the profile are zero:
+            # a box where the series is flat
+            floor = 1e-20 * np.abs(segments).max(axis=1, keepdims=True) ** 2
+            t = np.arange(B + n - 1, dtype=float)
+            tc = t - t.mean()
+            slope = segments.dot(tc) / tc.dot(tc)
+            segments = (segments - segments.mean(axis=1, keepdims=True)
+                        - slope[:, None] * tc)
+
+            zero = np.zeros((blocks, 1))
+            c_y = np.hstack([zero, np.cumsum(segments, axis=1)])
+            c_ty = np.hstack([zero, np.cumsum(t * segments, axis=1)])
+            c_yy = np.hstack([zero, np.cumsum(segments ** 2, axis=1)])
+            starts = np.arange(B)
+            stops = starts + n
+            s_y = c_y[:, stops] - c_y[:, starts]
+            # sum of (t - a) y over the box
+            s_ty = c_ty[:, stops] - c_ty[:, starts] - starts * s_y
+            s_yy = c_yy[:, stops] - c_yy[:, starts]
+            cov = s_ty - (n - 1) / 2. * s_y
+            rss = s_yy - s_y * s_y / n - cov * cov / (n * (n * n - 1) / 12.)
+            ms = np.where(rss / n > floor, rss / n, 0)
+            self._fluctuations[n] = ms.ravel()[:count]
+        return self._fluctuations[n]
+
+    def exponents(self, window, first, count, sizes=None):
+        """DFA exponents of the `count` windows x[s:s + window], s from
+        `first`, as nolds.dfa with overlapping boxes and a least
+        squares fit."""
+        if sizes is None:
+            sizes = dfa_box_sizes(window)
+        starts = first + np.arange(count)
+        log_f = np.empty((len(sizes), count))
+        for row, n in enumerate(sizes):
+            offsets = np.arange(0, window - n, n // 2)
+            # root of the mean square residual over the overlapping
+            # boxes of each window
+            boxes = self.fluctuations(n)[starts[:, None] + offsets]
+            with np.errstate(divide='ignore'):
+                log_f[row] = np.log(boxes.mean(axis=1)) / 2
+        # no exponent for windows without fluctuation at some box size
+        flat = np.isinf(log_f).any(axis=0)
+        log_f[:, flat] = 0
+        exponents = _slope_projection(np.log(sizes)).dot(log_f)
+        exponents[flat] = np.nan
+        return exponents
+
+
+_statistics = {'hurst': _LagStatistics, 'dfa': _BoxStatistics}
+
+
+def _rolling(x, windows, method, chunk, out, **kwargs):
+    """Fill out[row] with the exponents of the windows of length
+    windows[row] ending before each sample, a chunk of time at a time.
+    The statistics of a chunk are shared by all the window lengths."""
+    N = x.size
+    longest = max(windows)
+    for row, window in enumerate(windows):
+        out[row, :window] = 0
+    for start in range(min(windows), N, chunk):
+        stop = min(N, start + chunk)
+        lo = max(0, start - longest)
+        statistics = _statistics[method](x[lo:stop - 1])
+        for row, window in enumerate(windows):
+            first = max(start, window)
+            if first < stop:
+                out[row, first:stop] = statistics.exponents(
+                    window, first - window - lo, stop - first, **kwargs)
+    return out
+
+
+def rolling_hurst(ts, window=30, lags=None, chunk=4096, out=None):
+    """Hurst exponent of each window of `ts`, from the growth with lag
+    of the spread of the lagged differences: with tau(lag) the square
+    root of the standard deviation of x[t + lag] - x[t] over the
+    window, H is twice the slope of log tau on log lag.
+
+    The mean and mean square of the differences at each lag come from
+    running sums, so moving a window by one sample costs O(1) per lag
+    rather than a pass over the window, and the slope is a fixed
+    projection of the log lags. Time is processed in chunks of
+    `chunk` windows to bound the memory.
+
+    Arguments:
+        ts - the series
+        window - window length, at least 6 with the default lags
+        lags - lags to fit over (default 1 ... window // 2 - 1)
+        chunk - windows per chunk
+        out - preallocated output of the length of ts
+
+    Returns an array of the length of ts: zero for the first `window`
+    samples, then at index i the exponent of ts[i - window:i].
+    """
+    _check_lags(window, lags)
+    x = np.asarray(ts, dtype=float)
+    if out is None:
+        out = np.zeros(x.size)
+    _rolling(x, [window], 'hurst', chunk, out[None], lags=lags)
+    return out
+
+
+def rolling_dfa(ts, window=70, sizes=None, chunk=4096, out=None):
+    """Detrended fluctuation analysis exponent of each window of `ts`,
+    as nolds.dfa (overlapping boxes, order 1 detrending) with a least
+    squares line fit.
+
+    The detrended fluctuation of every box is found in O(1) from
+    cumulative sums of the profile, so all windows and box sizes are
+    done together rather than window by window. Time is processed in
+    chunks of `chunk` windows to bound the memory.
+
+    Arguments:
+        ts - the series
+        window - window length
+        sizes - box sizes (default as nolds.dfa for the window)
+        chunk - windows per chunk
+        out - preallocated output of the length of ts
+
+    Returns an array of the length of ts: zero for the first `window`
+    samples, then at index i the exponent of ts[i - window:i], NaN if
+    the series is flat over a box size's boxes of the window.
+    """
+    x = np.asarray(ts, dtype=float)
+    if out is None:
+        out = np.zeros(x.size)
+    _rolling(x, [window], 'dfa', chunk, out[None], sizes=sizes)
+    return out
+
+
+def hurst_surface(ts, windows=(30, 70, 250, 1000), method='dfa',
+                  chunk=4096, out=None):
+    """Rolling exponents at several window lengths side by side, from
+    one set of statistics per chunk of time: the box fluctuations of
+    the DFA profile (method 'dfa', see rolling_dfa) or the running
+    sums of the lagged differences (method 'hurst', see
+    rolling_hurst) are computed once and shared by all the windows.
+
+    Arguments:
+        ts - the series
+        windows - window lengths
+        method - 'dfa' or 'hurst'
+        chunk - windows per chunk; the memory held is about
+                chunk + max(windows) samples per box size or lag
+        out - preallocated (len(windows), len(ts)) output
+
+    Returns a (len(windows), len(ts)) array, row r as rolling_dfa or
+    rolling_hurst with window windows[r].
+    """
+    if method not in _statistics:
+        raise ValueError('method must be one of {}'
+                         .format(sorted(_statistics)))
+    if method == 'hurst':
+        for window in windows:
+            _check_lags(window, None)
+    x = np.asarray(ts, dtype=float)
+    if out is None:
+        out = np.zeros((len(windows), x.size))
+    return _rolling(x, list(windows), method, chunk, out)
+
+
+def _wavelet_levels(window, wavelet):
+    """Levels whose MODWT filter, of width (L - 1)(2^j - 1) + 1, fits
+    in half of the window, so that at least half the coefficients of a
+    window only depend on samples inside it."""
+    L = filter_bank(wavelet).dec_len
+    levels = int(np.floor(np.log2((window / 2. - 1) / (L - 1) + 1)))
+    return np.arange(1, max(levels, 2) + 1)
+
+
+def _filter_widths(levels, wavelet):
+    L = filter_bank(wavelet).dec_len
+    return (L - 1) * (2 ** levels - 1) + 1
+
+
+def wavelet_hurst(ts, wavelet='haar', levels=None):
+    """Scaling exponent of a series from its MODWT wavelet variance,
+    which grows with the scale tau_j = 2^(j - 1) of level j as
+    tau_j^(2 alpha - 2). alpha is on the scale of the DFA exponent:
+    about 0.5 for white noise, H for fractional gaussian noise and
+    H + 1 for fractional brownian motion.
+
+    The transform costs O(N log N); only the coefficients that do not
+    wrap around the ends of the series are used.
+
+    Arguments:
+        ts - the series
+        wavelet - pywt wavelet name
+        levels - levels to fit over (default those whose filter fits
+                 in half the series)
+    """
+    x = np.asarray(ts, dtype=float)
+    if levels is None:
+        levels = _wavelet_levels(x.size, wavelet)
+    levels = np.asarray(levels)
+    W = modwt(x - x.mean(), wavelet, level=levels.max())
+    widths = _filter_widths(levels, wavelet)
+    log_var = np.array([np.log(np.mean(W[j - 1, width - 1:] ** 2))
+                        for j, width in zip(levels, widths)])
+    slope = _slope_projection(np.log(2. ** (levels - 1))).dot(log_var)
+    return (slope + 2) / 2
+
+
+def rolling_wavelet_hurst(ts, window=70, wavelet='haar', levels=None,
+                          out=None):
+    """wavelet_hurst of each window of `ts`.
+
+    The MODWT filters are causal, so the coefficients at a time only
+    depend on the samples up to it: one transform of the whole series
+    (O(N log N)) gives the coefficients a streaming transform would
+    compute tick by tick. The wavelet variance of each window at each
+    level is then a running sum of the squared coefficients whose
+    filter lies inside the window, so each further window costs
+    O(levels).
+
+    Arguments:
+        ts - the series
+        window - window length
+        wavelet - pywt wavelet name
+        levels - levels to fit over (default those whose filter fits
+                 in half the window)
+        out - preallocated output of the length of ts
+
+    Returns an array of the length of ts: zero for the first `window`
+    samples, then at index i the exponent of ts[i - window:i].
+    """
+    x = np.asarray(ts, dtype=float)
+    N = x.size
+    if levels is None:
+        levels = _wavelet_levels(window, wavelet)
+    levels = np.asarray(levels)
+    if out is None:
+        out = np.zeros(N)
+    else:
+        out[:window] = 0
+    if N <= window:
+        return out
+
+    W = modwt(x - x.mean(), wavelet, level=levels.max())
+    widths = _filter_widths(levels, wavelet)
+    stops = np.arange(window, N)
+    log_var = np.empty((levels.size, stops.size))
+    for row, (j, width) in enumerate(zip(levels, widths)):
+        squares = _cumulative(W[j - 1] ** 2)
+        # coefficients at times stop - window + width - 1 ... stop - 1
+        n = window - width + 1
+        with np.errstate(divide='ignore'):
+            log_var[row] = np.log((squares[stops]
+                                   - squares[stops - n]) / n)
+
+    slope = _slope_projection(np.log(2. ** (levels - 1))).dot(log_var)
+    out[window:] = (slope + 2) / 2
+    return out
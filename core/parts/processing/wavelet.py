@@ -1,3 +1,4 @@
+from core.parts.processing.dwt import dwt_smooth
 from core.parts.processing.indexes import *
 from core.parts.wavelets.transform import WaveletAnalysis
 from core.parts.wavelets.wavelets import all_wavelets
@@ -32,15 +33,6 @@ def calculate_cwt(time_scale, date, x, folder_name, wavelet_name):
     #     print('mainLoop', str(e))
 
 
-def compute_dwt(x, wavelet_name='db1'):
-    w = pywt.Wavelet(wavelet_name)
-    scale = 3
-    cA, cD = pywt.dwt(x, wavelet=w, mode='per')
-    result = np.array([cA[0]])
-    for i in range(1, len(cA)):
-        temp = np.linspace(cA[i - 1], cA[i], scale)
-        result = np.append(result, temp[1:])
-        # result = result + temp[1:]
-    if len(x) != len(result):
-        result = np.append(result, [0])
-    return result
\ No newline at end of file
+def compute_dwt(x, wavelet_name='db1', level=1):
+    # smooth of x at `level`, reconstructed to the length of x
+    return dwt_smooth(x, wavelet_name, level)
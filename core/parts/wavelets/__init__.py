@@ -1,2 +1,13 @@
 from .wavelets import *
 from .transform import *
+from .kernels import *
+from .batch import *
+from .streaming import *
+from .chunked import *
+from .backend import *
+from .coherence import *
+from .correlation import *
+from .significance import *
+from .executor import *
+from .features import *
+from .ridges import *
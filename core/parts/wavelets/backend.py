@@ -0,0 +1,137 @@
+from __future__ import division
+
+from collections import Counter
+
+import numpy as np
+
+try:
+    import scipy.fft as scipy_fft
+except ImportError:
+    # scipy < 1.4
+    scipy_fft = None
+
+__all__ = ['FFTBackend', 'get_backend', 'set_backend']
+
+
+def _next_fast_len(N):
+    """Smallest 5-smooth number (2^a 3^b 5^c) not less than N."""
+    best = 2 ** int(np.ceil(np.log2(N)))
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            # smallest power of two taking p35 to at least N
+            m = p35
+            while m < N:
+                m *= 2
+            best = min(best, m)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+class FFTBackend(object):
+    """The ffts used by the wavelet transforms.
+
+    Arguments:
+        name - 'scipy' (scipy.fft, multithreaded with `workers`) or
+               'numpy' (numpy.fft)
+        workers - number of threads for scipy.fft (default 1, -1 for
+                  all cores). Ignored by numpy.
+        padding - how far to zero pad the data before transforming:
+                  'pow2' to the next power of two (as in TC98, the
+                  default), 'fast' to the next length with small prime
+                  factors, which is never longer and can be much
+                  shorter (9620 pads to 9625 with scipy, 9720 with
+                  numpy, rather than 16384), or 'none'.
+        real - use real input ffts of the data where the wavelet
+               allows it, i.e. is analytic (zero at negative
+               frequencies, e.g. Morlet and Paul)
+
+    Padding changes the result slightly near the edges, within the
+    cone of influence.
+
+    `sizes` counts the (data, padded) lengths transformed and
+    `block_sizes` the other padded lengths (the overlap-save blocks of
+    the kernels of cwt_time, the coherence smoothing); report()
+    summarises the backend and sizes used.
+    """
+    paddings = ('pow2', 'fast', 'none')
+
+    def __init__(self, name=None, workers=None, padding='pow2', real=True):
+        if name is None:
+            name = 'scipy' if scipy_fft is not None else 'numpy'
+        if name == 'scipy' and scipy_fft is None:
+            raise ImportError('scipy.fft needs scipy >= 1.4')
+        if name not in ('scipy', 'numpy'):
+            raise ValueError('unknown fft backend {}'.format(name))
+        if padding not in self.paddings:
+            raise ValueError('padding must be one of {}'
+                             .format(self.paddings))
+        self.name = name
+        self.workers = workers
+        self.padding = padding
+        self.real = real
+        self.sizes = Counter()
+        self.block_sizes = Counter()
+
+    def _kwargs(self):
+        if self.name == 'scipy' and self.workers is not None:
+            return {'workers': self.workers}
+        return {}
+
+    @property
+    def _module(self):
+        return scipy_fft if self.name == 'scipy' else np.fft
+
+    def padded_length(self, N, data=True):
+        """Length to zero pad N samples to, counted in `sizes` if they
+        are the data being transformed and in `block_sizes` if not."""
+        if self.padding == 'pow2':
+            pN = int(2 ** np.ceil(np.log2(N)))
+        elif self.padding == 'fast':
+            if self.name == 'scipy':
+                pN = scipy_fft.next_fast_len(N)
+            else:
+                pN = _next_fast_len(N)
+        else:
+            pN = N
+        (self.sizes if data else self.block_sizes)[(N, pN)] += 1
+        return pN
+
+    def fft(self, x, n=None, axis=-1):
+        return self._module.fft(x, n=n, axis=axis, **self._kwargs())
+
+    def ifft(self, x, n=None, axis=-1):
+        return self._module.ifft(x, n=n, axis=axis, **self._kwargs())
+
+    def rfft(self, x, n=None, axis=-1):
+        return self._module.rfft(x, n=n, axis=axis, **self._kwargs())
+
+    def report(self):
+        """Return a dict of the backend settings and of the sizes
+        transformed so far, as {(N, padded N): count}: 'sizes' for
+        the data, 'block_sizes' for the other transforms."""
+        return {'backend': self.name,
+                'workers': self.workers,
+                'padding': self.padding,
+                'real': self.real,
+                'sizes': dict(self.sizes),
+                'block_sizes': dict(self.block_sizes)}
+
+
+_backend = FFTBackend()
+
+
+def get_backend():
+    """Return the FFTBackend in use."""
+    return _backend
+
+
+def set_backend(name=None, workers=None, padding='pow2', real=True):
+    """Select the fft backend used by the wavelet transforms from
+    now on, see FFTBackend. Returns the new backend."""
+    global _backend
+    _backend = FFTBackend(name, workers=workers, padding=padding,
+                          real=real)
+    return _backend
@@ -0,0 +1,96 @@
+from __future__ import division
+
+import numpy as np
+
+from .backend import get_backend
+from .executor import get_policy
+from .kernels import kernel_bank
+from .transform import WaveletTransform, _padded_length
+from .wavelets import Morlet
+
+__all__ = ['batch_wavelet_power']
+
+
+def _block_power(task):
+    """Power of a block of rows; top level so that it can go to a
+    process pool."""
+    anomaly, filters, pN, N = task
+    backend = get_backend()
+    fft_data = backend.fft(anomaly, n=pN, axis=-1)
+    out = backend.ifft(fft_data[:, None, :] * filters[None], n=pN, axis=-1)
+    return np.abs(out[..., :N]) ** 2
+
+
+def batch_wavelet_power(data, mask=None, wavelet=Morlet(), dt=1, dj=0.125,
+                        scales=None, unbias=False, max_bytes=256 * 2 ** 20,
+                        bank=None):
+    """Wavelet power spectra of many series sharing the same time
+    axis, e.g. a universe of currency pairs over the same dates.
+
+    The series are transformed in blocks, each block with a single
+    forward and inverse fft over its rows. The block size is chosen
+    so that the complex intermediate of a block stays under
+    `max_bytes`.
+
+    Arguments:
+        data - (S, N) array, one series per row
+        mask - optional (S, N) boolean array, True where a sample is
+               valid. Invalid samples (e.g. before a pair started
+               trading) are excluded from the mean and variance, enter
+               the transform as zero anomaly and get NaN power.
+        wavelet - wavelet instance with a `frequency` representation
+        dt - sample spacing
+        dj - scale resolution
+        scales - scales to use (default the optimal scales for N, dt,
+                 dj, see WaveletTransform.compute_optimal_scales)
+        unbias - divide the power by the scale, as in Liu et al. 2007
+        max_bytes - memory budget for the complex intermediate of
+                    each block of rows
+        bank - KernelBank to take the filters from (default the
+               process wide kernel_bank)
+
+    Returns (scales, power), with power of shape (S, len(scales), N)
+    so that power[i] is the spectrum of series i.
+    """
+    if bank is None:
+        bank = kernel_bank
+    data = np.atleast_2d(np.asarray(data, dtype=float))
+    S, N = data.shape
+
+    if mask is None:
+        anomaly = data - data.mean(axis=1, keepdims=True)
+    else:
+        mask = np.asarray(mask, dtype=bool)
+        count = mask.sum(axis=1, keepdims=True)
+        mean = np.where(mask, data, 0).sum(axis=1, keepdims=True) / count
+        anomaly = np.where(mask, data - mean, 0)
+
+    if scales is None:
+        scales = WaveletTransform(data[0], dt=dt, dj=dj,
+                                  wavelet=wavelet).scales
+    scales = np.asarray(scales)
+
+    pN = _padded_length(N)
+    filters = bank.filters(wavelet.frequency, scales, pN, dt)
+
+    # rows per block: the product below is (rows, scales, pN) complex
+    row_bytes = len(scales) * pN * np.dtype(complex).itemsize
+    block = int(max(1, max_bytes // row_bytes))
+
+    # blocks of rows, spread according to the execution policy (the
+    # blocks go to worker processes under a process pool)
+    policy = get_policy()
+    starts = range(0, S, block)
+    if not policy.serial:
+        block = -(-S // max(len(starts), policy.workers))
+        starts = range(0, S, block)
+    tasks = [(anomaly[start:start + block], filters, pN, N)
+             for start in starts]
+    power = np.concatenate(policy.map(_block_power, tasks, processes=True))
+
+    if unbias:
+        power /= scales[:, None]
+    if mask is not None:
+        power[~np.broadcast_to(mask[:, None, :], power.shape)] = np.nan
+
+    return scales, power
@@ -0,0 +1,219 @@
+from __future__ import division
+
+import numpy as np
+import scipy.signal
+
+from .backend import get_backend
+from .kernels import KernelBank, kernel_bank
+from .transform import _kernel_times, _padded_length, precisions
+
+__all__ = ['cwt_power', 'cwt_power_chunked']
+
+
+def _power_output(out, shape, dtype=float):
+    """Return an array to write power of `shape` into: a new array if
+    out is None, a new .npy file memory mapped from disk if out is a
+    path, or out itself (e.g. a numpy.memmap)."""
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if isinstance(out, str):
+        return np.lib.format.open_memmap(out, mode='w+', dtype=dtype,
+                                         shape=shape)
+    if out.shape != shape:
+        raise ValueError('out has shape {}, need {}'.format(out.shape,
+                                                           shape))
+    return out
+
+
+def _power_blocks(data, wavelet, widths, dt=1, unbias=False, block=16,
+                  bank=None, precision='double'):
+    """Yield (rows, power) for consecutive blocks of scales, rows
+    being the slice of widths in the block; see cwt_power for the
+    arguments. The power array is reused between blocks."""
+    real, complex_ = precisions[precision]
+    data = np.asarray(data, dtype=real)
+    widths = np.asarray(widths)
+    N = data.shape[0]
+    M = len(widths)
+    pN = _padded_length(N)
+    backend = get_backend()
+    fft_data = backend.fft(data, n=pN).astype(complex_, copy=False)
+
+    if bank is None:
+        bank = kernel_bank
+    if bank is not False:
+        filters = bank.filters(wavelet, widths, pN, dt, dtype=complex_)
+
+    power = np.empty((min(block, M), N), dtype=real)
+    for start in range(0, M, block):
+        rows = slice(start, start + block)
+        if bank is False:
+            block_filters = KernelBank.evaluate(wavelet, widths[rows], pN,
+                                                dt, dtype=complex_)
+        else:
+            block_filters = filters[rows]
+        W = backend.ifft(block_filters * fft_data, n=pN, axis=-1)[:, :N]
+
+        p = power[:W.shape[0]]
+        np.square(W.real, out=p)
+        p += np.square(W.imag)
+        if unbias:
+            p /= widths[rows, None]
+        yield rows, p
+
+
+def cwt_power(data, wavelet, widths, dt=1, out=None, reduce=None,
+              unbias=False, block=16, bank=None, precision='double'):
+    """Wavelet power |W|^2 of a 1 dimensional series, computed in
+    frequency space a block of scales at a time so that the complex
+    coefficients of all scales are never held at once.
+
+    Parameters
+    ----------
+    data : (N,) ndarray
+    wavelet : function
+        Frequency representation of the wavelet, taking (w, width).
+    widths : (M,) sequence
+    dt : float
+    out : None or ndarray
+        Preallocated output, of the shape given below.
+    reduce : None, 'scales' or 'time'
+        None returns the (M, N) power; 'scales' its sum over scales,
+        (N,); 'time' its mean over time, (M,).
+    unbias : boolean
+        Divide the power by the scale (Liu et al. 2007).
+    block : int
+        Number of scales per block.
+    bank : None, KernelBank or False
+        Where to take the filters from: None for the process wide
+        kernel_bank, or False to evaluate each block's filters on the
+        fly, so that no (M, pN) filter matrix is held either.
+    precision : 'double' or 'single', see cwt.
+    """
+    real, _ = precisions[precision]
+    M = len(widths)
+    N = np.shape(data)[0]
+    shape = {None: (M, N), 'scales': (N,), 'time': (M,)}[reduce]
+    if out is None:
+        out = np.empty(shape, dtype=real)
+    if reduce == 'scales':
+        out[:] = 0
+
+    for rows, p in _power_blocks(data, wavelet, widths, dt, unbias=unbias,
+                                 block=block, bank=bank,
+                                 precision=precision):
+        if reduce is None:
+            out[rows] = p
+        elif reduce == 'scales':
+            out += p.sum(axis=0)
+        elif reduce == 'time':
+            out[rows] = p.mean(axis=1)
+    return out
+
+
+def _power_freq(data, wavelet, widths, dt, out, max_bytes):
+    N = data.shape[0]
+    pN = _padded_length(N)
+    # scales per block: the block filters and product are both
+    # (scales, pN) complex
+    row_bytes = 2 * pN * np.dtype(complex).itemsize
+    block = int(max(1, max_bytes // row_bytes))
+    return cwt_power(data, wavelet, widths, dt, out=out, block=block,
+                     bank=False)
+
+
+def _power_time_blocks(data, wavelet, widths, dt=1, unbias=False,
+                       max_bytes=64 * 2 ** 20):
+    """Yield (rows, power) for one scale at a time, the power (1, N)
+    computed in time with temporaries bounded by max_bytes; see
+    cwt_power_chunked. The power array is reused between scales."""
+    N = data.shape[0]
+    # samples per block of output and per segment of kernel: each
+    # fftconvolve holds about four complex arrays of the two together
+    size = int(max(16, max_bytes // (8 * np.dtype(complex).itemsize)))
+    power = np.empty((1, N))
+    for ind, width in enumerate(widths):
+        # same kernel as cwt_time, truncated to what can overlap data
+        t, c = _kernel_times(width, dt, N)
+        norm = (dt / width) ** .5
+        kernel = norm * wavelet(t, width)
+        K = kernel.size
+
+        # the 'same' output at i is the full convolution at i + c; each
+        # block of output sums the convolutions of the kernel segments
+        # with the data they overlap
+        for a in range(0, N, size):
+            b = min(N, a + size)
+            W = np.zeros(b - a, dtype=complex)
+            for k in range(0, K, size):
+                segment = kernel[k:k + size]
+                lo = max(0, a + c - k - segment.size + 1)
+                hi = min(N, b + c - k)
+                if lo >= hi:
+                    continue
+                full = scipy.signal.fftconvolve(data[lo:hi], segment,
+                                                mode='full')
+                # full[m] is the convolution at lo + k + m
+                m = a + c - k - lo
+                first, last = max(m, 0), min(m + b - a, full.size)
+                if first < last:
+                    W[first - m:last - m] += full[first:last]
+            power[0, a:b] = np.abs(W) ** 2
+        if unbias:
+            power /= width
+        yield slice(ind, ind + 1), power
+
+
+def _power_time(data, wavelet, widths, dt, out, max_bytes):
+    for rows, power in _power_time_blocks(data, wavelet, widths, dt,
+                                          max_bytes=max_bytes):
+        out[rows] = power
+    return out
+
+
+def cwt_power_chunked(data, wavelet, widths, dt=1, frequency=False,
+                      out=None, max_bytes=64 * 2 ** 20):
+    """Wavelet power |W|^2 of a 1 dimensional series, computed in
+    chunks so that peak memory is bounded by `max_bytes` plus the
+    output, which can live on disk.
+
+    In frequency space the scales are processed in blocks sharing
+    one forward fft of the data. In time the convolution at each
+    scale is done a block of time and a segment of the kernel at a
+    time, both sized from `max_bytes` (at least 16 samples).
+
+    Parameters
+    ----------
+    data : (N,) ndarray
+    wavelet : function
+        As for cwt: a time or (if frequency) frequency representation
+        taking (t or w, width).
+    widths : (M,) sequence
+    dt : float
+    frequency : boolean
+        Whether the wavelet is a frequency representation.
+    out : None, str or (M, N) ndarray
+        Where to write the power. None allocates in memory; a str is
+        the path of a .npy file that is created and memory mapped; an
+        array, e.g. a numpy.memmap, is written into.
+    max_bytes : int
+        Memory budget for the temporaries of each chunk.
+
+    Returns
+    -------
+    power : (M, N) ndarray, memmap if writing to disk.
+    """
+    data = np.asarray(data)
+    if data.ndim != 1:
+        raise ValueError('chunked transform needs 1 dimensional data')
+    widths = np.asarray(widths)
+    out = _power_output(out, (len(widths), data.shape[0]))
+
+    if frequency:
+        _power_freq(data, wavelet, widths, dt, out, max_bytes)
+    else:
+        _power_time(data, wavelet, widths, dt, out, max_bytes)
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
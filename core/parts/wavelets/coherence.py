@@ -0,0 +1,167 @@
+from __future__ import division
+
+import numpy as np
+import scipy.ndimage
+
+from .backend import get_backend
+from .transform import WaveletTransform
+from .wavelets import Morlet
+
+__all__ = ['CrossWaveletTransform', 'smooth_wavelet']
+
+
+def smooth_wavelet(arr, scales, dt=1, dj=0.125, scale_smoothing=0.6):
+    """Smooth a (scales, time) array in time and scale, as needed for
+    wavelet coherence (Torrence and Webster 1999, Grinsted et al.
+    2004). Suitable for the Morlet wavelet.
+
+    In time, each scale is convolved with a gaussian of width equal
+    to the scale; this is done for all scales at once as one fft of
+    the whole array, zero padded by four times the largest scale so
+    that the end doesn't wrap around onto the start. In scale, the
+    result is convolved with a boxcar `scale_smoothing` octaves wide
+    (at least one scale).
+    """
+    backend = get_backend()
+    M, N = arr.shape
+    s = (np.asarray(scales) / dt)[:, None]
+    # pad by four standard deviations of the widest gaussian, so that
+    # the end doesn't wrap around onto the start
+    pN = backend.padded_length(N + int(np.ceil(4 * s.max())), data=False)
+
+    # gaussian in time is a gaussian in frequency, exp(-(s w)^2 / 2)
+    w = 2 * np.pi * np.fft.fftfreq(pN)
+    gaussian = np.exp(-0.5 * (s * w) ** 2)
+    smooth = backend.ifft(backend.fft(arr, n=pN, axis=-1) * gaussian,
+                          axis=-1)[:, :N]
+    if not np.iscomplexobj(arr):
+        smooth = smooth.real
+
+    # boxcar in scale, with fractional end weights
+    steps = scale_smoothing / (2 * dj)
+    if round(steps) < 1:
+        # narrower than the spacing of the scales: at least one scale
+        kernel = np.ones(1)
+    else:
+        ends = steps % 1
+        width = 2 * int(round(steps)) - 1
+        kernel = np.hstack([ends, np.ones(width), ends]) / (width
+                                                            + 2 * ends)
+    if np.iscomplexobj(smooth):
+        return (scipy.ndimage.convolve1d(smooth.real, kernel, axis=0,
+                                         mode='constant')
+                + 1j * scipy.ndimage.convolve1d(smooth.imag, kernel,
+                                                axis=0, mode='constant'))
+    return scipy.ndimage.convolve1d(smooth, kernel, axis=0,
+                                    mode='constant')
+
+
+class CrossWaveletTransform(object):
+    """Cross wavelet transform and wavelet coherence of two series
+    sampled at the same times, e.g. two currency pairs.
+
+    Both series are transformed together, as one two row
+    WaveletTransform: they share the filters from the kernel bank and
+    a single batched forward fft.
+
+    See Torrence and Compo 1998 S6 and Grinsted et al. 2004.
+    """
+    def __init__(self, x, y, time=None, dt=1, dj=0.125, wavelet=Morlet(),
+                 scale_smoothing=0.6):
+        """Arguments:
+            x, y - 1 dimensional input signals of the same length
+            time - corresponding times (default starting at zero)
+            dt - sample spacing
+            dj - scale resolution
+            wavelet - wavelet instance with a `frequency`
+                      representation
+            scale_smoothing - width of the scale smoothing for the
+                              coherence, in octaves (0.6 for the
+                              Morlet)
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if x.shape != y.shape or x.ndim != 1:
+            raise ValueError('x and y must be 1 dimensional and of '
+                             'the same length')
+        self.transform = WaveletTransform(np.vstack([x, y]), time=time,
+                                          dt=dt, dj=dj, wavelet=wavelet,
+                                          frequency=True)
+        self.scale_smoothing = scale_smoothing
+
+    @property
+    def scales(self):
+        return self.transform.scales
+
+    @property
+    def time(self):
+        return self.transform.time
+
+    @property
+    def fourier_periods(self):
+        return self.transform.fourier_periods
+
+    @property
+    def coi(self):
+        return self.transform.coi
+
+    @property
+    def wavelet_transforms(self):
+        """The wavelet transforms of x and y, each (scales, time)."""
+        W = self.transform.wavelet_transform
+        return W[:, 0], W[:, 1]
+
+    @property
+    def cross_wavelet_transform(self):
+        """W_xy = W_x W_y*, (scales, time) complex."""
+        W_x, W_y = self.wavelet_transforms
+        return W_x * W_y.conj()
+
+    @property
+    def cross_power(self):
+        """Cross wavelet power |W_xy|."""
+        return np.abs(self.cross_wavelet_transform)
+
+    @property
+    def phase(self):
+        """Phase difference of x over y, in radians. Positive where x
+        leads y."""
+        return np.angle(self.cross_wavelet_transform)
+
+    def smooth(self, arr):
+        """Smooth a (scales, time) array in time and scale, see
+        smooth_wavelet."""
+        t = self.transform
+        return smooth_wavelet(arr, self.scales, dt=t.dt, dj=t.dj,
+                              scale_smoothing=self.scale_smoothing)
+
+    def _smoothed(self):
+        W_x, W_y = self.wavelet_transforms
+        s = self.scales[:, None]
+        S_xy = self.smooth(W_x * W_y.conj() / s)
+        S_x = self.smooth(np.abs(W_x) ** 2 / s)
+        S_y = self.smooth(np.abs(W_y) ** 2 / s)
+        return S_xy, S_x, S_y
+
+    @property
+    def coherence(self):
+        """Squared wavelet coherence, between 0 and 1,
+
+            R^2 = |S(W_xy / s)|^2 / (S(|W_x|^2 / s) S(|W_y|^2 / s))
+
+        with S the time and scale smoothing.
+        """
+        S_xy, S_x, S_y = self._smoothed()
+        return np.abs(S_xy) ** 2 / (S_x * S_y)
+
+    @property
+    def coherence_phase(self):
+        """Phase of the smoothed cross spectrum, in radians."""
+        S_xy, _, _ = self._smoothed()
+        return np.angle(S_xy)
+
+    @property
+    def time_lag(self):
+        """Lead of x over y in time units, from the phase difference
+        and the equivalent fourier period of each scale."""
+        return (self.phase.T * self.fourier_periods / (2 * np.pi)).T
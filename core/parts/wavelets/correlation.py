@@ -0,0 +1,136 @@
+from __future__ import division
+
+import numpy as np
+
+from .backend import get_backend
+from .chunked import _power_output
+from .kernels import kernel_bank
+from .transform import WaveletTransform, _padded_length
+from .wavelets import Morlet
+
+__all__ = ['band_signals', 'band_correlation']
+
+
+def _band_filters(template, bands, pN, bank):
+    """Frequency space filters giving the band averaged coefficients
+    directly: the reconstruction sum of S3.i restricted to the scales
+    in each band is linear in the filters, so it can be summed over
+    the scales before the inverse fft. Returns (B, pN)."""
+    scales = template.scales
+    periods = template.fourier_periods
+    weights = np.zeros((len(bands), len(scales)))
+    for i, (lo, hi) in enumerate(bands):
+        inside = (periods >= lo) & (periods < hi)
+        if not inside.any():
+            raise ValueError('no scales with periods in [{}, {})'
+                             .format(lo, hi))
+        weights[i, inside] = scales[inside] ** -.5
+
+    dj, dt = template.dj, template.dt
+    Y_00 = np.real(template.wavelet.time(0))
+    weights *= dj * dt ** .5 / (template.C_d * Y_00)
+    filters = bank.filters(template.wavelet.frequency, scales, pN, dt)
+    return weights.dot(filters)
+
+
+def band_signals(data, bands, wavelet=Morlet(), dt=1, dj=0.125, out=None,
+                 dtype=np.float32, max_bytes=256 * 2 ** 20, bank=None):
+    """Band pass components of many series sharing the same time axis,
+    e.g. a universe of currency pairs: for each band of fourier
+    periods, the reconstruction (S3.i) from the scales in the band
+
+        x_n = (dj * dt^(1/2)) / (C_d * Y_0(0)) \
+                * Sum_(j in band) { Re(W_n(s_j)) / s_j^(1/2) }
+
+    Each series is transformed once; the sum over the scales of a
+    band is folded into a single filter, so the inverse ffts are per
+    band rather than per scale and no (series, scales, time) array is
+    formed.
+
+    Arguments:
+        data - (S, N) array, one series per row
+        bands - sequence of (min period, max period) in time units,
+                half open
+        wavelet - wavelet instance with a `frequency` representation
+        dt - sample spacing
+        dj - scale resolution
+        out - None, path of a .npy file or (S, B, N) array to write
+              the result into, see cwt_power_chunked
+        dtype - dtype of the result (float32 by default, to keep it
+                compact)
+        max_bytes - memory budget for the complex intermediate of
+                    each block of series
+        bank - KernelBank to take the filters from (default the
+               process wide kernel_bank)
+
+    Returns the (S, B, N) band signals.
+    """
+    if bank is None:
+        bank = kernel_bank
+    data = np.atleast_2d(np.asarray(data, dtype=float))
+    S, N = data.shape
+    anomaly = data - data.mean(axis=1, keepdims=True)
+
+    template = WaveletTransform(data[0], dt=dt, dj=dj, wavelet=wavelet,
+                                frequency=True)
+    backend = get_backend()
+    pN = _padded_length(N)
+    filters = _band_filters(template, bands, pN, bank)
+
+    out = _power_output(out, (S, len(filters), N), dtype=dtype)
+    row_bytes = len(filters) * pN * np.dtype(complex).itemsize
+    block = int(max(1, max_bytes // row_bytes))
+    for start in range(0, S, block):
+        rows = slice(start, start + block)
+        fft_data = backend.fft(anomaly[rows], n=pN, axis=-1)
+        W = backend.ifft(fft_data[:, None, :] * filters[None], n=pN,
+                         axis=-1)
+        out[rows] = W[..., :N].real
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+
+def _standardise(signals):
+    """(rows, B, N) -> (B, rows, N), zero mean and unit norm over
+    time, so that the dot product of two rows is their correlation."""
+    z = np.asarray(signals, dtype=float).transpose(1, 0, 2)
+    z = z - z.mean(axis=-1, keepdims=True)
+    norm = np.sqrt(np.square(z).sum(axis=-1, keepdims=True))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return z / norm
+
+
+def band_correlation(data=None, bands=None, signals=None, block=256,
+                     **kwargs):
+    """Correlation matrices of many series, one per band of periods.
+
+    The band signals (see band_signals) are standardised over time and
+    correlated with batched matrix products over all bands at once,
+    a tile of `block` x `block` series at a time, so that only two
+    tiles of signals are in memory if `signals` lives on disk.
+
+    Arguments:
+        data - (S, N) array, one series per row
+        bands - sequence of (min period, max period) in time units
+        signals - precomputed (S, B, N) band signals, e.g. a memmap
+                  written by band_signals, instead of data and bands
+        block - series per tile
+        **kwargs - passed to band_signals
+
+    Returns a (B, S, S) array, the correlation matrix of each band.
+    """
+    if signals is None:
+        signals = band_signals(data, bands, **kwargs)
+    S, B, N = signals.shape
+
+    corr = np.empty((B, S, S))
+    for i in range(0, S, block):
+        zi = _standardise(signals[i:i + block])
+        for j in range(i, S, block):
+            zj = zi if j == i else _standardise(signals[j:j + block])
+            c = np.matmul(zi, zj.transpose(0, 2, 1))
+            corr[:, i:i + block, j:j + block] = c
+            corr[:, j:j + block, i:i + block] = c.transpose(0, 2, 1)
+    return corr
@@ -0,0 +1,96 @@
+from __future__ import division
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+__all__ = ['ExecutionPolicy', 'get_policy', 'set_policy']
+
+# set in pool workers, so that nested maps run serially there rather
+# than each starting a pool of its own
+_worker = threading.local()
+
+
+def _serial_worker():
+    global _policy
+    _policy = ExecutionPolicy()
+
+
+def _run_in_thread(fn, item):
+    _worker.active = True
+    try:
+        return fn(item)
+    finally:
+        _worker.active = False
+
+
+class ExecutionPolicy(object):
+    """How the wavelet package spreads independent pieces of work:
+    blocks of scales within a transform, wavelet families in
+    multi_wavelet_transform and blocks of series in
+    batch_wavelet_power and the significance monte carlo.
+
+    Arguments:
+        kind - 'serial' (the default), 'thread' for a thread pool or
+               'process' for a process pool
+        workers - number of threads or processes (default the number
+                  of cores)
+
+    The ffts release the GIL, so threads scale over scales and
+    wavelets without copying any data. Work that shares arrays in
+    memory (scales and wavelets of one transform) always uses threads;
+    only series blocks, which are independent, go to processes.
+
+    Each piece of work is computed exactly as it would be serially,
+    so the results are identical whatever the policy.
+    """
+    kinds = ('serial', 'thread', 'process')
+
+    def __init__(self, kind='serial', workers=None):
+        if kind not in self.kinds:
+            raise ValueError('kind must be one of {}'.format(self.kinds))
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+
+    @property
+    def serial(self):
+        return (self.kind == 'serial' or self.workers == 1
+                or getattr(_worker, 'active', False))
+
+    def map(self, fn, items, processes=False):
+        """Return [fn(item) for item in items], computed according to
+        the policy. fn and items must be picklable if `processes` is
+        set and the policy is a process pool."""
+        items = list(items)
+        if self.serial or len(items) < 2:
+            return [fn(item) for item in items]
+        workers = min(self.workers, len(items))
+        if processes and self.kind == 'process':
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_serial_worker) as pool:
+                return list(pool.map(fn, items))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_run_in_thread, [fn] * len(items), items))
+
+    def blocks(self, n, min_size=1):
+        """Split range(n) into at most one slice per worker, each of
+        at least min_size (but the last)."""
+        parts = 1 if self.serial else self.workers
+        size = max(min_size, -(-n // parts))
+        return [slice(start, start + size) for start in range(0, n, size)]
+
+
+_policy = ExecutionPolicy()
+
+
+def get_policy():
+    """Return the ExecutionPolicy in use."""
+    return _policy
+
+
+def set_policy(kind='serial', workers=None):
+    """Select how the wavelet package spreads its work from now on,
+    see ExecutionPolicy. Returns the new policy."""
+    global _policy
+    _policy = ExecutionPolicy(kind, workers=workers)
+    return _policy
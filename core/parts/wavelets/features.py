@@ -0,0 +1,61 @@
+from __future__ import division
+
+import numpy as np
+
+__all__ = ['normalised_spectrum', 'wavelet_features']
+
+
+def normalised_spectrum(power):
+    """Power at each time divided by its sum over scales, so that each
+    column of the (scales, time) result sums to one (zero where there
+    is no power)."""
+    power = np.asarray(power)
+    total = power.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, power / total, 0)
+
+
+def wavelet_features(power, periods, bands=(), index=None,
+                     dtype=np.float32):
+    """Features of a (scales, time) power spectrum, one row per time,
+    computed with a few reductions over the scale axis:
+
+        power - power summed over scales
+        band_<lo>_<hi> - power summed over the scales with period in
+                         [lo, hi), for each band
+        band_<lo>_<hi>_share - the same as a fraction of the total
+        dominant_period - period of the largest power
+
+    Arguments:
+        power - (M, N) wavelet power, e.g. wa.wavelet_power
+        periods - (M,) period of each scale, e.g. wa.fourier_periods
+        bands - sequence of (min period, max period)
+        index - index of the frame, e.g. the dates of the series
+        dtype - dtype of the columns
+
+    Returns a pandas DataFrame.
+    """
+    import pandas as pd
+
+    power = np.asarray(power)
+    periods = np.asarray(periods)
+    total = power.sum(axis=0)
+
+    columns = {'power': total}
+    if len(bands):
+        lo, hi = np.asarray(bands, dtype=float).T
+        # (bands, scales) indicator, so that all bands are one product
+        inside = ((periods >= lo[:, None])
+                  & (periods < hi[:, None])).astype(power.dtype)
+        energy = inside.dot(power)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            share = np.where(total > 0, energy / total, 0)
+        for (a, b), e, s in zip(bands, energy, share):
+            name = 'band_{:g}_{:g}'.format(a, b)
+            columns[name] = e
+            columns[name + '_share'] = s
+    columns['dominant_period'] = periods[np.argmax(power, axis=0)]
+
+    return pd.DataFrame({name: np.asarray(column, dtype=dtype)
+                         for name, column in columns.items()},
+                        index=index)
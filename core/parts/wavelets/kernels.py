@@ -0,0 +1,156 @@
+from __future__ import division
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+__all__ = ['KernelBank', 'kernel_bank']
+
+
+def _wavelet_key(wavelet):
+    """Hashable identity of a wavelet instance: its class and
+    parameters (e.g. w0 for the Morlet, m for Paul and DOG)."""
+    try:
+        params = tuple(sorted(vars(wavelet).items()))
+        hash(params)
+    except TypeError:
+        return (type(wavelet), id(wavelet))
+    return (type(wavelet), params)
+
+
+def _function_key(wavelet):
+    """Hashable identity of a wavelet function. Bound methods of the
+    wavelet classes (e.g. Morlet().frequency) are keyed by the
+    instance parameters, so that equal wavelets share their kernels.
+    """
+    owner = getattr(wavelet, '__self__', None)
+    if owner is not None:
+        return (wavelet.__name__, _wavelet_key(owner))
+    return wavelet
+
+
+class KernelBank(object):
+    """Least recently used store of frequency domain wavelet filters
+    (and of the spectra of the sampled kernels used by cwt_time).
+
+    Evaluating the wavelet over every (scale, frequency) pair is a
+    large part of the cost of cwt_freq: Paul calls factorial, DOG
+    builds a hermite polynomial and the Morlet masks the heaviside.
+    The normalised and conjugated filter matrix only depends on the
+    wavelet, the padded length, dt and the scales, so series that
+    share these can share the filters.
+
+    max_bytes caps the memory held; the least recently used filters
+    are dropped first and a filter larger than the cap is never
+    stored. Setting max_bytes to 0 disables the bank.
+    """
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._store = OrderedDict()
+        # whether the stored filters are zero at negative frequencies
+        self._analytic = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._store)
+
+    @staticmethod
+    def evaluate(wavelet, widths, pN, dt, dtype=complex):
+        """Compute the conjugated filter matrix, (len(widths), pN),
+        without going through the bank. `dtype` is the complex dtype
+        giving the precision; real filters (e.g. the Morlet) stay real.
+        """
+        widths = np.asarray(widths)
+        # angular frequencies
+        w_k = np.fft.fftfreq(pN, d=dt) * 2 * np.pi
+        # sample wavelet and normalise
+        norm = (2 * np.pi * widths / dt) ** .5
+        wavelet_data = norm[:, None] * wavelet(w_k, widths[:, None])
+        if not np.iscomplexobj(wavelet_data):
+            return wavelet_data.astype(np.finfo(dtype).dtype, copy=False)
+        return wavelet_data.conj().astype(dtype, copy=False)
+
+    def get(self, key, compute):
+        """Return the array stored under `key`, calling compute() to
+        create (and store) it if it is missing.
+
+        The returned array is shared and so is read only.
+        """
+        with self._lock:
+            if key in self._store:
+                self._store.move_to_end(key)
+                self.hits += 1
+                return self._store[key]
+            self.misses += 1
+
+        value = compute()
+        value.setflags(write=False)
+
+        with self._lock:
+            if value.nbytes <= self.max_bytes and key not in self._store:
+                self._store[key] = value
+                self.nbytes += value.nbytes
+                while self.nbytes > self.max_bytes:
+                    dropped_key, dropped = self._store.popitem(last=False)
+                    self._analytic.pop(dropped_key, None)
+                    self.nbytes -= dropped.nbytes
+        return value
+
+    def filters(self, wavelet, widths, pN, dt, dtype=complex):
+        """Return the conjugated, normalised frequency representation
+        of `wavelet` at `widths` over the pN fourier frequencies of
+        spacing dt, shape (len(widths), pN), as `dtype`.
+
+        The returned array is shared and so is read only.
+        """
+        key = self._filters_key(wavelet, widths, pN, dt, dtype)
+
+        def compute():
+            filters = self.evaluate(wavelet, widths, pN, dt, dtype)
+            self._analytic[key] = not np.any(filters[:, pN // 2 + 1:])
+            return filters
+
+        return self.get(key, compute)
+
+    @staticmethod
+    def _filters_key(wavelet, widths, pN, dt, dtype):
+        widths = np.asarray(widths)
+        return (_function_key(wavelet), pN, dt, np.dtype(dtype).str,
+                widths.shape, widths.dtype.str, widths.tobytes())
+
+    def analytic(self, wavelet, widths, pN, dt, dtype=complex):
+        """Whether the filters of `wavelet` (see self.filters) are zero
+        at all negative frequencies, so that only the non-negative half
+        of the spectrum of real data is needed. Free once the filters
+        are in the bank."""
+        key = self._filters_key(wavelet, widths, pN, dt, dtype)
+        flag = self._analytic.get(key)
+        if flag is None:
+            filters = self.filters(wavelet, widths, pN, dt, dtype)
+            flag = not np.any(filters[:, pN // 2 + 1:])
+        return flag
+
+    def clear(self):
+        """Drop all stored filters and reset the counters."""
+        with self._lock:
+            self._store.clear()
+            self._analytic.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Return a dict of the hit / miss counters and memory used."""
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._store),
+                'nbytes': self.nbytes,
+                'max_bytes': self.max_bytes}
+
+
+# process wide bank used by cwt_freq unless told otherwise
+kernel_bank = KernelBank()
@@ -0,0 +1,194 @@
+from __future__ import division
+
+import numpy as np
+
+__all__ = ['ridge_peaks', 'link_ridges', 'wavelet_ridges']
+
+
+def _scale_blocks(power, block):
+    """(rows, power) blocks of scales of an (M, N) array, which can be
+    a memmap, so that only `block` scales are read at a time."""
+    for start in range(0, power.shape[0], block):
+        rows = slice(start, start + block)
+        yield rows, np.asarray(power[rows])
+
+
+def ridge_peaks(blocks, M, N, k=3):
+    """The k largest local maxima along scale of the power at each
+    time, from the power given a block of scales at a time, so that
+    the whole (M, N) spectrum is never needed at once.
+
+    Arguments:
+        blocks - iterable of (rows, power), consecutive blocks of
+                 scales covering 0 ... M, e.g. from _power_blocks
+        M, N - number of scales and times
+        k - number of peaks kept per time
+
+    Returns (scale index, power), each (k, N) with the peaks of each
+    time in decreasing power; missing peaks have index -1 and power
+    -inf.
+    """
+    best = (np.full((k, N), -np.inf), np.full((k, N), -1))
+
+    def merge(best, centre, below, above, first):
+        # local maxima of centre along scale, merged into the best k
+        peak = (centre >= below) & (centre > above)
+        values = np.vstack([best[0], np.where(peak, centre, -np.inf)])
+        indices = np.vstack([best[1], np.broadcast_to(
+            np.arange(first, first + len(centre))[:, None], centre.shape)])
+        top = np.argpartition(-values, k - 1, axis=0)[:k]
+        return (np.take_along_axis(values, top, axis=0),
+                np.take_along_axis(indices, top, axis=0))
+
+    # the last row of each block is decided with the next block; below
+    # is the row before the first undecided one
+    below = np.full((1, N), -np.inf)
+    carry = None
+    for rows, p in blocks:
+        first = rows.start
+        if carry is not None:
+            p = np.vstack([carry, p])
+            first -= 1
+        if len(p) > 1:
+            best = merge(best, p[:-1], np.vstack([below, p[:-2]]), p[1:],
+                         first)
+            below = p[-2:-1].copy()
+        carry = p[-1:].copy()
+    best = merge(best, carry, below, np.full((1, N), -np.inf), M - 1)
+    best_power, best_index = best
+
+    order = np.argsort(-best_power, axis=0)
+    best_power = np.take_along_axis(best_power, order, axis=0)
+    best_index = np.take_along_axis(best_index, order, axis=0)
+    best_index[~np.isfinite(best_power)] = -1
+    return best_index, best_power
+
+
+def _match_peaks(index, max_jump):
+    """For each peak, the peak of the previous time it continues, or -1:
+    nearest pairs within max_jump scales first (ties to the stronger
+    peaks, which come first in index), matched for all times at once,
+    one pair per time per pass."""
+    k, N = index.shape
+    previous = np.hstack([np.full((k, 1), -1), index[:, :-1]])
+    # (N, peak, previous peak)
+    distance = np.abs(index.T[:, :, None]
+                      - previous.T[:, None, :]).astype(float)
+    distance[((index.T < 0)[:, :, None]) | ((previous.T < 0)[:, None, :])] \
+        = np.inf
+    distance[distance > max_jump] = np.inf
+
+    match = np.full((N, k), -1)
+    times = np.arange(N)
+    for _ in range(k):
+        flat = distance.reshape(N, -1).argmin(axis=1)
+        peak, other = np.divmod(flat, k)
+        found = np.isfinite(distance[times, peak, other])
+        t = times[found]
+        match[t, peak[found]] = other[found]
+        distance[t, peak[found], :] = np.inf
+        distance[t, :, other[found]] = np.inf
+    return match.T
+
+
+def link_ridges(index, max_jump=2):
+    """Link the peaks of consecutive times into ridges.
+
+    Each peak continues the ridge of the nearest peak at the previous
+    time within `max_jump` scales (nearest pairs first); other peaks
+    start new ridges. The peaks are moved between the k rows so that a
+    ridge keeps its row while it lasts.
+
+    The matching is done for all times at once and the ridges found by
+    pointer jumping along the matches, so the only loop in time is over
+    the starts of ridges, to give each the lowest row free.
+
+    Arguments:
+        index - (k, N) scale index of the peaks, -1 where missing, as
+                from ridge_peaks
+
+    Returns (order, ridge): order (k, N) such that
+    np.take_along_axis(index, order, axis=0) puts each ridge in its
+    row, and ridge (k, N), the id of the ridge of each row (-1 where
+    empty).
+    """
+    k, N = index.shape
+    match = _match_peaks(index, max_jump)
+
+    # nodes t k + peak, each pointing at the node it continues, or at
+    # itself if it starts a ridge; jump to the start of each ridge
+    node = np.arange(N)[None, :] * k + np.arange(k)[:, None]
+    parent = np.where(match >= 0, node - k - np.arange(k)[:, None]
+                      + match, node).T.ravel()
+    exists = (index >= 0).T.ravel()
+    while True:
+        grand = parent[parent]
+        if np.array_equal(grand, parent):
+            break
+        parent = grand
+    starts = np.flatnonzero(exists & (parent == np.arange(parent.size)))
+    # ridges are numbered by start time, then peak
+    ids = np.full(parent.size, -1)
+    ids[exists] = np.searchsorted(starts, parent[exists])
+    ends = np.full(starts.size, -1)
+    np.maximum.at(ends, ids[exists], np.flatnonzero(exists) // k)
+
+    # lowest row free at the start of each ridge
+    row_end = [-1] * k
+    rows = np.empty(starts.size, dtype=int)
+    for r, (start, end) in enumerate(zip((starts // k).tolist(),
+                                         ends.tolist())):
+        row = next(i for i in range(k) if row_end[i] < start)
+        row_end[row] = end
+        rows[r] = row
+
+    ids = ids.reshape(N, k).T
+    present = ids >= 0
+    t = np.broadcast_to(np.arange(N), (k, N))
+    peak = np.broadcast_to(np.arange(k)[:, None], (k, N))
+    ridge = np.full((k, N), -1)
+    order = np.full((k, N), -1)
+    row = rows[ids[present]]
+    ridge[row, t[present]] = ids[present]
+    order[row, t[present]] = peak[present]
+    # empty rows take the missing peaks, in order
+    empty = np.argsort(order >= 0, axis=0, kind='stable')
+    missing = np.argsort(present, axis=0, kind='stable')
+    count = (~present).sum(axis=0)
+    for j in range(k):
+        fill = j < count
+        order[empty[j, fill], np.flatnonzero(fill)] = missing[j, fill]
+    return order, ridge
+
+
+def wavelet_ridges(blocks, periods, N, k=3, max_jump=2):
+    """Dominant cycles through time: the k strongest ridges of the
+    wavelet power, see ridge_peaks and link_ridges.
+
+    Arguments:
+        blocks - (M, N) power (e.g. a memmap from chunked_power), or
+                 an iterable of (rows, power) blocks of scales
+        periods - (M,) period of each scale
+        N - number of times
+        k - number of ridges kept at each time
+        max_jump - largest jump in scale index within a ridge
+
+    Returns a dict of (k, N) arrays, one ridge per row: 'period' and
+    'power' (float32, NaN where the row is empty) and 'ridge', the
+    ridge id (int32, -1 where empty).
+    """
+    periods = np.asarray(periods)
+    M = len(periods)
+    if hasattr(blocks, 'shape'):
+        blocks = _scale_blocks(blocks, 16)
+    index, power = ridge_peaks(blocks, M, N, k)
+    order, ridge = link_ridges(index, max_jump)
+    index = np.take_along_axis(index, order, axis=0)
+    power = np.take_along_axis(power, order, axis=0)
+
+    empty = index < 0
+    return {'period': np.where(empty, np.nan,
+                               periods[np.maximum(index, 0)])
+                        .astype(np.float32),
+            'power': np.where(empty, np.nan, power).astype(np.float32),
+            'ridge': ridge.astype(np.int32)}
@@ -0,0 +1,130 @@
+from __future__ import division
+
+import numpy as np
+import scipy.signal
+import scipy.stats
+
+from .batch import batch_wavelet_power
+from .executor import ExecutionPolicy, get_policy
+from .wavelets import DOG, Morlet, Paul
+
+__all__ = ['lag1_autocorrelation', 'red_noise_spectrum',
+           'significance_levels', 'significance_mask']
+
+
+def lag1_autocorrelation(data):
+    """Lag-1 autocorrelation of a 1 dimensional series, the alpha of
+    the AR(1) red noise model of S4."""
+    x = np.asarray(data, dtype=float)
+    x = x - x.mean()
+    return np.dot(x[:-1], x[1:]) / np.dot(x, x)
+
+
+def red_noise_spectrum(alpha, frequencies):
+    """Normalised fourier power spectrum of AR(1) red noise, eq 16,
+
+        P_k = (1 - a^2) / (1 + a^2 - 2 a cos(2 pi f_k))
+
+    with the frequencies f_k in cycles per sample."""
+    return ((1 - alpha ** 2)
+            / (1 + alpha ** 2 - 2 * alpha * np.cos(2 * np.pi * frequencies)))
+
+
+def _red_noise(rng, alpha, variance, size, N):
+    """(size, N) AR(1) series of lag-1 autocorrelation alpha and the
+    given variance, started from the stationary distribution."""
+    noise = rng.randn(size, N) * (variance * (1 - alpha ** 2)) ** .5
+    noise[:, 0] /= (1 - alpha ** 2) ** .5
+    return scipy.signal.lfilter([1], [1, -alpha], noise, axis=-1)
+
+
+def _surrogate_batch(task):
+    """Wavelet power of one batch of red noise surrogates, at the
+    sampled times. Top level so that it can go to a process pool; each
+    process fills and reuses its own kernel bank."""
+    (seed, index, size, alpha, variance, N, wavelet, dt, dj, scales,
+     unbias, times) = task
+    rng = np.random.RandomState([seed, index])
+    surrogates = _red_noise(rng, alpha, variance, size, N)
+    _, power = batch_wavelet_power(surrogates, wavelet=wavelet, dt=dt,
+                                   dj=dj, scales=scales, unbias=unbias)
+    # (scales, size * len(times))
+    return power[:, :, times].transpose(1, 0, 2).reshape(len(scales), -1)
+
+
+def _monte_carlo_levels(wa, alpha, level, surrogates, batch, processes,
+                        seed, samples):
+    N = wa.N
+    # red noise is stationary: pool the power over times in the middle
+    # half of the series, away from the edges of the padded transform
+    times = np.linspace(N // 4, 3 * N // 4, samples).astype(int)
+    tasks = [(seed, index, min(batch, surrogates - start), alpha,
+              wa.data_variance.item(), N, wa.wavelet, wa.dt, wa.dj,
+              np.asarray(wa.scales), wa.unbias, times)
+             for index, start in enumerate(range(0, surrogates, batch))]
+
+    if processes is None:
+        policy = get_policy()
+    else:
+        policy = ExecutionPolicy('process', workers=processes)
+    results = policy.map(_surrogate_batch, tasks, processes=True)
+    return np.percentile(np.hstack(results), 100 * level, axis=1)
+
+
+def significance_levels(wa, level=0.95, alpha=None, method=None,
+                        surrogates=1000, batch=50, processes=None, seed=0,
+                        samples=16):
+    """Wavelet power that AR(1) red noise exceeds with probability
+    1 - level at each scale, in the units of wa.wavelet_power (S4).
+
+    Arguments:
+        wa - WaveletTransform of a 1 dimensional series
+        level - confidence level, e.g. 0.95
+        alpha - lag-1 autocorrelation of the red noise (default
+                estimated from the data)
+        method - 'analytic' for the chi-square levels of eq 18, which
+                 hold for the Morlet, Paul and DOG wavelets (the
+                 default for these), or 'monte_carlo' to simulate red
+                 noise surrogates (the default for other wavelets)
+        surrogates - number of surrogate series for the monte carlo
+        batch - surrogates transformed together; each batch is
+                transformed at once with batch_wavelet_power
+        processes - number of worker processes to spread the batches
+                    over (default as set by set_policy)
+        seed - seed of the surrogates. Each batch is seeded from
+               (seed, batch index), so the levels do not depend on
+               the number of processes.
+        samples - times per surrogate at which the power is sampled
+
+    Returns an array of shape (len(wa.scales),).
+    """
+    if wa.data.ndim != 1:
+        raise ValueError('significance needs a 1 dimensional series')
+    if alpha is None:
+        alpha = lag1_autocorrelation(wa.data)
+    if method is None:
+        known = isinstance(wa.wavelet, (Morlet, Paul, DOG))
+        method = 'analytic' if known else 'monte_carlo'
+
+    if method == 'monte_carlo':
+        return _monte_carlo_levels(wa, alpha, level, surrogates, batch,
+                                   processes, seed, samples)
+    elif method != 'analytic':
+        raise ValueError('unknown method {}'.format(method))
+
+    # degrees of freedom: 2 for complex wavelets, 1 for real (DOG)
+    dof = 1 if isinstance(wa.wavelet, DOG) else 2
+    spectrum = red_noise_spectrum(alpha, wa.dt / wa.fourier_periods)
+    levels = (wa.data_variance.item() * spectrum
+              * scipy.stats.chi2.ppf(level, dof) / dof)
+    if wa.unbias:
+        levels = levels / wa.scales
+    return levels
+
+
+def significance_mask(wa, level=0.95, **kwargs):
+    """Boolean array aligned with wa.wavelet_power, True where the
+    power is significant against red noise at `level`. See
+    significance_levels for the other arguments."""
+    levels = significance_levels(wa, level=level, **kwargs)
+    return wa.wavelet_power > levels[:, None]
@@ -0,0 +1,157 @@
+from __future__ import division
+
+import numpy as np
+
+from .kernels import kernel_bank
+from .transform import WaveletTransform, cwt_freq
+from .wavelets import Morlet
+
+__all__ = ['StreamingWaveletTransform']
+
+
+class StreamingWaveletTransform(object):
+    """Wavelet power spectrum of a series that grows by appending
+    samples, e.g. new bars of a live quote.
+
+    Appending samples at the end only changes the transform inside
+    the cone of influence at the end of the series: at scale s, the
+    last reach(s) = edge * coi(s) / dt columns. Each append recomputes
+    the transform of each group of scales (about an octave of reach)
+    over a trailing window twice the largest reach of the group, and
+    writes back, at each scale, only the columns inside its own reach.
+    The cost of an append therefore depends on the scales and the
+    number of samples appended, not on the length of the history.
+
+    Two things differ from recomputing the full transform:
+
+    - the anomaly is taken w.r.t. the mean of the initial data, so
+      that old columns stay valid as samples arrive
+    - columns older than the cone are not revisited. `edge` scales
+      the cone (in units of the e-folding time) to trade latency for
+      accuracy. The smallest scales, whose filters are cut off at the
+      nyquist frequency, are not well localised in time: their reach
+      is at least `min_reach`, and they still differ the most.
+
+    The scales are fixed when the transform is created: they bound
+    the window length and so the latency per append. By default only
+    the scales reaching at most `max_reach` samples are kept.
+    """
+    def __init__(self, data, dt=1, dj=0.125, wavelet=Morlet(), scales=None,
+                 unbias=False, edge=3, max_reach=None, min_reach=32,
+                 bank=None):
+        """Arguments:
+            data - 1 dimensional initial history
+            dt - sample spacing
+            dj - scale resolution
+            wavelet - wavelet instance with `frequency` and `coi`
+            scales - scales to use (default the optimal scales for the
+                     initial history whose reach is at most max_reach)
+            unbias - divide the power by the scale (Liu et al. 2007)
+            edge - multiple of the cone of influence that is
+                   recomputed on append (default 3)
+            max_reach - bound, in samples, on the reach of the default
+                        scales and so on the latency of an append
+                        (default a quarter of the initial history);
+                        the scales at min_reach are always kept
+            min_reach - least number of trailing columns recomputed at
+                        a scale, for the smallest scales whose filters
+                        are cut off at the nyquist frequency
+            bank - KernelBank to take the filters from (default the
+                   process wide kernel_bank)
+        """
+        wt = WaveletTransform(np.asarray(data, dtype=float), dt=dt, dj=dj,
+                              wavelet=wavelet, unbias=unbias,
+                              frequency=True)
+        if scales is None:
+            if max_reach is None:
+                max_reach = wt.N // 4
+            reach = self._reach(wavelet, wt.scales, dt, edge, min_reach)
+            # the smallest scales are kept however short the history
+            wt.scales = wt.scales[reach <= max(max_reach, reach.min())]
+        else:
+            wt.scales = np.asarray(scales)
+
+        self.dt = dt
+        self.dj = dj
+        self.wavelet = wavelet
+        self.unbias = unbias
+        self.bank = kernel_bank if bank is None else bank
+        self.scales = wt.scales
+        self.mean = wt.data.mean()
+        # number of trailing columns at each scale inside the cone
+        self.reach = self._reach(wavelet, self.scales, dt, edge, min_reach)
+        # scales are transformed in groups of about an octave of reach,
+        # each over a window twice the largest reach of the group
+        octave = np.floor(np.log2(self.reach)).astype(int)
+        self._groups = [np.flatnonzero(octave == o)
+                        for o in np.unique(octave)]
+
+        self.N = wt.N
+        self._data = wt.data.copy()
+        self._power = np.array(wt.wavelet_power)
+
+    @staticmethod
+    def _reach(wavelet, scales, dt, edge, min_reach):
+        return np.maximum(np.ceil(edge * wavelet.coi(scales) / dt),
+                          min_reach).astype(int)
+
+    @property
+    def data(self):
+        return self._data[:self.N]
+
+    @property
+    def wavelet_power(self):
+        """(scales, N) power spectrum of everything appended so far.
+        This is a view, valid until the next append."""
+        return self._power[:, :self.N]
+
+    @property
+    def time(self):
+        return np.arange(self.N) * self.dt
+
+    def _reserve(self, n):
+        """Make room for n samples, doubling the buffers so that
+        appends are amortised O(1) in the history length."""
+        capacity = self._data.shape[0]
+        if n <= capacity:
+            return
+        capacity = max(n, 2 * capacity)
+
+        data = np.empty(capacity)
+        data[:self.N] = self.data
+        self._data = data
+
+        power = np.empty((len(self.scales), capacity))
+        power[:, :self.N] = self.wavelet_power
+        self._power = power
+
+    def append(self, values):
+        """Append one or more samples and update the trailing, cone
+        affected columns of the power spectrum.
+
+        Returns the index of the first column that was updated.
+        """
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+        old_N = self.N
+        new_N = old_N + values.size
+        self._reserve(new_N)
+        self._data[old_N:new_N] = values
+
+        self.N = new_N
+        for rows in self._groups:
+            reach = self.reach[rows]
+            # start the window far enough back that its edge doesn't
+            # reach the columns refreshed at any scale of the group
+            start = max(0, old_N - 2 * reach.max())
+            window = self._data[start:new_N] - self.mean
+            W = cwt_freq(window, self.wavelet.frequency, self.scales[rows],
+                         self.dt, -1, bank=self.bank)
+            power = np.abs(W) ** 2
+            if self.unbias:
+                power /= self.scales[rows, None]
+            # at each scale only refresh the columns inside its cone
+            for row, r, p in zip(rows, reach, power):
+                first = max(0, old_N - r)
+                self._power[row, first:new_N] = p[first - start:]
+
+        return max(0, old_N - self.reach.max())
@@ -6,12 +6,22 @@ import scipy.signal
 import scipy.optimize
 import scipy.special
 
-from .wavelets import Morlet
+from .backend import get_backend
+from .executor import get_policy
+from .kernels import _function_key, _wavelet_key, kernel_bank
+from .wavelets import Morlet, wavelet_constants
 
-__all__ = ['cwt', 'WaveletAnalysis', 'WaveletTransform']
+__all__ = ['cwt', 'WaveletAnalysis', 'WaveletTransform',
+           'multi_wavelet_transform']
 
+# (real, complex) dtypes used throughout the transform at each
+# precision
+precisions = {'double': (np.float64, np.complex128),
+              'single': (np.float32, np.complex64)}
 
-def cwt(data, wavelet=None, widths=None, dt=1, frequency=False, axis=-1):
+
+def cwt(data, wavelet=None, widths=None, dt=1, frequency=False, axis=-1,
+        precision='double'):
     """Continuous wavelet transform using the fourier transform
     convolution as used in Terrence and Compo.
 
@@ -67,6 +77,13 @@ def cwt(data, wavelet=None, widths=None, dt=1, frequency=False, axis=-1):
     axis: int, the axis in the data over which to perform the 1D
           transform (default 0)
 
+    precision: 'double' (default) or 'single'. In single precision
+               the data, wavelet, ffts and output are all float32 /
+               complex64, halving memory and bandwidth. Compared to
+               double precision, the power |W|^2 is then accurate to
+               about 1e-6 of its maximum (the error grows like
+               log2(N) times the float32 epsilon, 1.2e-7).
+
     Returns
     -------
     cwt: (M, N) ndarray
@@ -80,66 +97,176 @@ def cwt(data, wavelet=None, widths=None, dt=1, frequency=False, axis=-1):
         raise UserWarning('Have to specify a wavelet function')
 
     if frequency:
-        return cwt_freq(data, wavelet, widths, dt, axis)
+        return cwt_freq(data, wavelet, widths, dt, axis,
+                        precision=precision)
     elif not frequency:
-        return cwt_time(data, wavelet, widths, dt, axis)
+        return cwt_time(data, wavelet, widths, dt, axis,
+                        precision=precision)
 
 
-def cwt_time(data, wavelet, widths, dt, axis):
+def _kernel_times(width, dt, N):
+    """Times at which cwt_time samples the wavelet of the given
+    width, truncated to the 2N - 1 about the centre that can overlap
+    N samples of data, and the index of the centre.
+    """
+    # number of points needed to capture wavelet
+    M = 10 * width / dt
+    # times to use, centred at zero
+    t = np.arange((-M + 1) / 2., (M + 1) / 2.) * dt
+    centre = (t.size - 1) // 2
+    lo = max(0, centre - (N - 1))
+    return t[lo:centre + N], centre - lo
+
+
+def cwt_time(data, wavelet, widths, dt, axis, precision='double',
+             bank=None):
+    """Compute the cwt in time, by convolution with the sampled
+    wavelet at each width (giving the 'same' output of
+    scipy.signal.fftconvolve).
+
+    The convolution is done by overlap-save: the fft length is chosen
+    per scale from the kernel length, and the scales that share an
+    fft length share one forward fft of the blocks of data. Kernels
+    longer than the data are truncated to the part that can overlap
+    it, and their spectra are kept in `bank` (default the process
+    wide kernel_bank), so the cost is O(N log N) per scale.
+    """
+    if bank is None:
+        bank = kernel_bank
+    backend = get_backend()
+    real, complex_ = precisions[precision]
+    # transform over the last axis
+    data = np.moveaxis(np.asarray(data, dtype=real), axis, -1)
+    N = data.shape[-1]
     # wavelets can be complex so output is complex
-    output = np.zeros((len(widths),) + data.shape, dtype=np.complex)
+    output = np.zeros((len(widths),) + data.shape, dtype=complex_)
 
-    # compute in time
-    slices = [None for _ in data.shape]
-    slices[axis] = slice(None)
+    # kernel spectra, grouped by fft length
+    groups = {}
     for ind, width in enumerate(widths):
-        # number of points needed to capture wavelet
-        M = 10 * width / dt
-        # times to use, centred at zero
-        t = np.arange((-M + 1) / 2., (M + 1) / 2.) * dt
-        # sample wavelet and normalise
-        norm = (dt / width) ** .5
-        wavelet_data = norm * wavelet(t, width)
-        output[ind, :] = scipy.signal.fftconvolve(data,
-                                                    wavelet_data[slices],
-                                                    mode='same')
-    return output
-
-
-def cwt_freq(data, wavelet, widths, dt, axis):
+        t, centre = _kernel_times(width, dt, N)
+        K = t.size
+        # blocks of at least min(K, N) outputs
+        L = _padded_length(K + min(K, N) - 1, data=False)
+
+        def spectrum(t=t, width=width, L=L):
+            # sample wavelet and normalise
+            norm = (dt / width) ** .5
+            wavelet_data = norm * wavelet(t, width)
+            return backend.fft(wavelet_data, n=L).astype(complex_)
+
+        key = ('time', _function_key(wavelet), width, dt, N, L,
+               np.dtype(complex_).str)
+        H = bank.get(key, spectrum)
+        groups.setdefault(L, []).append((ind, K, centre, H))
+
+    for L, kernels in groups.items():
+        K = max(k for _, k, _, _ in kernels)
+        # outputs per block
+        B = L - K + 1
+        n_blocks = -(-(N + K - 1) // B)
+
+        # overlapping blocks of the data, K - 1 zeros in front
+        padded = np.zeros(data.shape[:-1] + (n_blocks * B + K - 1,),
+                          dtype=real)
+        padded[..., K - 1:K - 1 + N] = data
+        blocks = (np.arange(n_blocks)[:, None] * B + np.arange(L))
+        fft_blocks = backend.fft(padded[..., blocks], axis=-1)
+
+        def convolve(kernel, K=K, B=B, n_blocks=n_blocks,
+                     fft_blocks=fft_blocks):
+            ind, _, centre, H = kernel
+            # discard the first K - 1 outputs of each block
+            out = backend.ifft(fft_blocks * H, axis=-1)[..., K - 1:]
+            out = out.reshape(data.shape[:-1] + (n_blocks * B,))
+            output[ind] = out[..., centre:centre + N]
+
+        # scales spread according to the execution policy
+        get_policy().map(convolve, kernels)
+
+    return np.moveaxis(output, -1, axis % data.ndim + 1)
+
+
+def _padded_length(N, data=True):
+    """Length to zero pad to, by default the next highest power of
+    two, see FFTBackend.padded_length."""
+    return get_backend().padded_length(N, data)
+
+
+def cwt_freq(data, wavelet, widths, dt, axis, bank=None, fft_data=None,
+             precision='double'):
+    """Compute the cwt in frequency space. The filters for the given
+    wavelet, padded length, dt and widths are taken from `bank`, a
+    KernelBank, which defaults to the process wide kernel_bank.
+
+    fft_data, if given, is the forward fft of `data` padded to
+    _padded_length, so that it can be shared between wavelets.
+
+    The ffts are done by the backend selected with set_backend. If it
+    allows real ffts and the wavelet is analytic (zero at negative
+    frequencies), only the non-negative half of the spectrum of the
+    data is computed and multiplied.
+    """
+    if bank is None:
+        bank = kernel_bank
+    backend = get_backend()
+    real, complex_ = precisions[precision]
+    data = np.asarray(data, dtype=real)
     # compute in frequency
-    # next highest power of two for padding
     N = data.shape[axis]
-    pN = int(2 ** np.ceil(np.log2(N)))
+    pN = _padded_length(N)
     # N.B. padding in fft adds zeros to the *end* of the array,
     # not equally either end.
-    fft_data = scipy.fft(data, n=pN, axis=axis)
-    # frequencies
-    w_k = np.fft.fftfreq(pN, d=dt) * 2 * np.pi
-
-    # sample wavelet and normalise
-    norm = (2 * np.pi * widths / dt) ** .5
-    wavelet_data = norm[:, None] * wavelet(w_k, widths[:, None])
+    # normalised, conjugated wavelet in frequency space
+    widths = np.asarray(widths)
+    wavelet_data = bank.filters(wavelet, widths, pN, dt, dtype=complex_)
+
+    half = (backend.real and fft_data is None
+            and bank.analytic(wavelet, widths, pN, dt, dtype=complex_))
+    if half:
+        fft_data = backend.rfft(data, n=pN, axis=axis)
+    elif fft_data is None:
+        fft_data = backend.fft(data, n=pN, axis=axis)
+    fft_data = fft_data.astype(complex_, copy=False)
 
     # Convert negative axis. Add one to account for
     # inclusion of widths axis above.
-    axis = (axis % data.ndim) + 1
+    data_axis = axis % data.ndim
+    axis = data_axis + 1
 
     # perform the convolution in frequency space
     slices = [slice(None)] + [None for _ in data.shape]
     slices[axis] = slice(None)
-
-    out = scipy.ifft(fft_data[None] * wavelet_data.conj()[slices],
-                     n=pN, axis=axis)
-
+    shape = list((len(widths),) + data.shape)
+    shape[axis] = pN
     # remove zero padding
-    slices = [slice(None) for _ in out.shape]
-    slices[axis] = slice(None, N)
+    trim = [slice(None) for _ in shape]
+    trim[axis] = slice(None, N)
+
+    def transform(rows):
+        filters = wavelet_data[rows]
+        if half:
+            # the negative frequencies of the product are all zero
+            n_half = fft_data.shape[data_axis]
+            product = np.zeros([len(filters)] + shape[1:], dtype=complex_)
+            product_slices = [slice(None) for _ in shape]
+            product_slices[axis] = slice(None, n_half)
+            product[tuple(product_slices)] = \
+                fft_data[None] * filters[:, :n_half][tuple(slices)]
+        else:
+            product = fft_data[None] * filters[tuple(slices)]
+        out = backend.ifft(product, n=pN, axis=axis)
+        return out.astype(complex_, copy=False)[tuple(trim)]
+
+    # blocks of scales, spread according to the execution policy
+    policy = get_policy()
+    parts = policy.map(transform, policy.blocks(len(widths)))
+    out = parts[0] if len(parts) == 1 else np.concatenate(parts)
 
     if data.ndim == 1:
-        return out[slices].squeeze()
+        return out.squeeze()
     else:
-        return out[slices]
+        return out
 
 
 class WaveletTransform(object):
@@ -205,7 +332,8 @@ class WaveletTransform(object):
     """
     def __init__(self, data=None, time=None, dt=1,
                  dj=0.125, wavelet=Morlet(), unbias=False,
-                 mask_coi=False, frequency=False, axis=-1):
+                 mask_coi=False, frequency=False, axis=-1,
+                 precision='double'):
         """Arguments:
             data - 1 dimensional input signal
             time - corresponding times for the input signal
@@ -226,15 +354,14 @@ class WaveletTransform(object):
                        influence when computing global wavelet spectrum
                        (default False)
             axis - axis of the input data to transform over (default -1)
+            precision - 'double' (default) or 'single', the precision
+                        of the transform and so of the power, see cwt
         """
+        self.axis = axis
         self.data = data
         if time is None:
             time = np.indices((data.shape[axis],)).squeeze() * dt
         self.time = time
-        self.anomaly_data = self.data - self.data.mean(axis=axis,
-                                                       keepdims=True)
-        self.N = data.shape[axis]
-        self.data_variance = self.data.var(axis=axis, keepdims=True)
         self.dt = dt
         self.dj = dj
         self.wavelet = wavelet
@@ -243,7 +370,33 @@ class WaveletTransform(object):
         self.frequency = frequency
         self.unbias = unbias
         self.mask_coi = mask_coi
-        self.axis = axis
+        self.precision = precision
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        """Setting new data recomputes the anomaly and variance and
+        discards any cached transform."""
+        axis = self.axis
+        self._data = value
+        self.anomaly_data = value - value.mean(axis=axis, keepdims=True)
+        self.N = value.shape[axis]
+        self.data_variance = value.var(axis=axis, keepdims=True)
+        self.clear_cache()
+
+    @property
+    def anomaly_data(self):
+        return self._anomaly_data
+
+    @anomaly_data.setter
+    def anomaly_data(self, value):
+        """The data the transform is computed from; setting it
+        discards any cached transform."""
+        self._anomaly_data = value
+        self.clear_cache()
 
     @property
     def fourier_period(self):
@@ -260,13 +413,14 @@ class WaveletTransform(object):
     @property
     def s0(self):
         if not hasattr(self, '_s0'):
-            return self.find_s0()
+            return wavelet_constants.s0(self.wavelet, self.dt)
         else:
             return self._s0
 
     @s0.setter
     def s0(self, value):
         setattr(self, '_s0', value)
+        self.clear_cache()
 
     def find_s0(self):
         """Find the smallest resolvable scale by finding where the
@@ -282,13 +436,16 @@ class WaveletTransform(object):
     @property
     def scales(self):
         if not hasattr(self, '_scales'):
-            return self.compute_optimal_scales()
+            # the same as compute_optimal_scales, but looked up
+            return wavelet_constants.scales(self.wavelet, self.N, self.dt,
+                                            self.dj, self.s0)
         else:
             return self._scales
 
     @scales.setter
     def scales(self, value):
         setattr(self, '_scales', value)
+        self.clear_cache()
 
     def compute_optimal_scales(self):
         """Form a set of scales to use in the wavelet transform.
@@ -354,11 +511,14 @@ class WaveletTransform(object):
                 w_k *= -1
         return w_k
 
-    @property
-    def wavelet_transform(self):
-        """Calculate the wavelet transform."""
-        widths = self.scales
+    def _transform_key(self):
+        """Everything besides the data, the anomaly and the explicit
+        scales / s0 (whose setters clear the cache) that the transform
+        depends on."""
+        return (self.frequency, self.dt, self.dj, self.axis, self.cwt,
+                self.precision, _wavelet_key(self.wavelet))
 
+    def _compute_transform(self, widths):
         if self.frequency:
             wavelet = self.wavelet.frequency
         else:
@@ -369,7 +529,35 @@ class WaveletTransform(object):
                         widths=widths,
                         dt=self.dt,
                         frequency=self.frequency,
-                        axis=self.axis)
+                        axis=self.axis,
+                        precision=self.precision)
+
+    def compute(self):
+        """Calculate the wavelet transform, or return the cached one
+        if nothing it depends on has changed since it was computed.
+
+        The returned array is shared with the cache and so is marked
+        read only; copy it before modifying in place.
+        """
+        key = self._transform_key()
+        cached = getattr(self, '_transform_cache', None)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        W = self._compute_transform(self.scales)
+        W.setflags(write=False)
+        self._transform_cache = (key, W)
+        return W
+
+    def clear_cache(self):
+        """Release the cached wavelet transform."""
+        self._transform_cache = None
+
+    @property
+    def wavelet_transform(self):
+        """Calculate the wavelet transform. Computed once and cached,
+        see self.compute and self.clear_cache."""
+        return self.compute()
 
     @property
     def wavelet_power(self):
@@ -382,6 +570,68 @@ class WaveletTransform(object):
         elif not self.unbias:
             return np.abs(self.wavelet_transform) ** 2
 
+    def fused_power(self, reduce=None, out=None, block=16):
+        """Wavelet power spectrum, or its sum over scales
+        (reduce='scales') or mean over time (reduce='time'), computed
+        a block of scales at a time without materialising the complex
+        transform. See cwt_power.
+
+        Nothing is cached. Only for 1 dimensional data, in frequency
+        space.
+        """
+        from .chunked import cwt_power
+
+        return cwt_power(self.anomaly_data, self.wavelet.frequency,
+                         self.scales, dt=self.dt, out=out, reduce=reduce,
+                         unbias=self.unbias, block=block,
+                         precision=self.precision)
+
+    def ridges(self, k=3, max_jump=2, block=16):
+        """The k strongest ridges of the wavelet power through time,
+        see wavelet_ridges. The power is computed a block of scales
+        at a time (in time, one scale at a time) and never held whole.
+
+        Only for 1 dimensional data.
+        """
+        from .chunked import _power_blocks, _power_time_blocks
+        from .ridges import wavelet_ridges
+
+        if self.frequency:
+            blocks = _power_blocks(self.anomaly_data, self.wavelet.frequency,
+                                   self.scales, dt=self.dt,
+                                   unbias=self.unbias, block=block,
+                                   precision=self.precision)
+        else:
+            blocks = _power_time_blocks(self.anomaly_data, self.wavelet.time,
+                                        self.scales, dt=self.dt,
+                                        unbias=self.unbias)
+        return wavelet_ridges(blocks, self.fourier_periods, self.N, k=k,
+                              max_jump=max_jump)
+
+    def chunked_power(self, out=None, max_bytes=64 * 2 ** 20):
+        """Wavelet power spectrum computed in chunks, bounding the
+        peak memory by max_bytes plus the output, which can be a
+        memory mapped .npy file. See cwt_power_chunked.
+
+        Nothing is cached. Only for 1 dimensional data.
+        """
+        from .chunked import cwt_power_chunked
+
+        if self.frequency:
+            wavelet = self.wavelet.frequency
+        else:
+            wavelet = self.wavelet.time
+
+        scales = self.scales
+        power = cwt_power_chunked(self.anomaly_data, wavelet, scales,
+                                  dt=self.dt, frequency=self.frequency,
+                                  out=out, max_bytes=max_bytes)
+        if self.unbias:
+            # scale by scale, so as not to load a memmap whole
+            for ind, s in enumerate(scales):
+                power[ind] /= s
+        return power
+
     def reconstruction(self, scales=None):
         """Reconstruct the original signal from the wavelet
         transform. See S3.i.
@@ -406,14 +656,12 @@ class WaveletTransform(object):
         C_d = self.C_d
         Y_00 = self.wavelet.time(0)
         if scales is not None:
-            old_scales = self.scales
-            self.scales = scales
-
-        s = self.scales
-        W_n = self.wavelet_transform
-
-        if scales is not None:
-            self.scales = old_scales
+            # one-off transform over other scales, leave the cache be
+            s = scales
+            W_n = self._compute_transform(scales)
+        else:
+            s = self.scales
+            W_n = self.wavelet_transform
 
         # use the transpose to allow broadcasting
         real_sum = np.sum(W_n.real.T / s ** .5, axis=-1).T
@@ -433,21 +681,102 @@ class WaveletTransform(object):
         var = self.data_variance
         return mean_power / var
 
+    @property
+    def coi_indices(self):
+        """Per scale, the first and (one past the) last time index
+        outside the cone of influence, i.e. of the times t with
+
+            Tmin + coi(s) < t < Tmax - coi(s)
+
+        Returns two integer arrays of len(scales). Where the cone
+        covers every time, first >= last.
+        """
+        t = self.time
+        c = self.wavelet.coi(self.scales)
+        first = np.searchsorted(t, t.min() + c, side='right')
+        last = np.searchsorted(t, t.max() - c, side='left')
+        return first, np.maximum(first, last)
+
+    def _coi_range(self, start=None, stop=None):
+        """Per scale time index range [first, last), intersected with
+        [start, stop), respecting self.mask_coi."""
+        n = np.ones(len(self.scales), dtype=int)
+        start = 0 if start is None else start
+        stop = self.N if stop is None else stop
+        first, last = start * n, stop * n
+        if self.mask_coi:
+            coi_first, coi_last = self.coi_indices
+            first = np.maximum(first, coi_first)
+            last = np.maximum(first, np.minimum(last, coi_last))
+        return first, last
+
+    @staticmethod
+    def _range_mean(arr, first, last, axis):
+        """Mean of arr (scales, ..., time) over [first[j], last[j])
+        of the time axis for each scale j, from cumulative sums.
+        NaN where the range is empty."""
+        arr = np.moveaxis(arr, axis, -1)
+        csum = np.zeros(arr.shape[:-1] + (arr.shape[-1] + 1,))
+        np.cumsum(arr, axis=-1, out=csum[..., 1:])
+
+        shape = (len(first),) + (1,) * (arr.ndim - 1)
+        total = (np.take_along_axis(csum, last.reshape(shape), axis=-1)
+                 - np.take_along_axis(csum, first.reshape(shape), axis=-1))
+        count = (last - first).reshape(shape)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (total / count)[..., 0]
+
     def coi_mean(self, arr, axis=1):
         """Calculate a mean, but only over times within the cone of
         influence.
 
         Implement so can replace np.mean(wavelet_power, axis=1)
+
+        Uses the per scale index ranges of self.coi_indices and
+        cumulative sums, rather than masking. NaN for scales whose
+        cone covers every time.
+        """
+        first, last = self.coi_indices
+        return self._range_mean(arr, first, last, axis)
+
+    @property
+    def _time_axis(self):
+        """Time axis of the (scales, ...) transform and power."""
+        return self.axis % self.data.ndim + 1
+
+    def time_averaged_power(self, start=None, stop=None):
+        """Wavelet power averaged over the time indices [start, stop)
+        at each scale (S5.a), over times outside the cone of influence
+        only if self.mask_coi."""
+        first, last = self._coi_range(start, stop)
+        return self._range_mean(self.wavelet_power, first, last,
+                                self._time_axis)
+
+    def scale_averaged_power(self, smin=None, smax=None):
+        """Scale averaged wavelet power (S5.b, eq24), the weighted sum
+        of power over scales smin <= s <= smax,
+
+            dj * dt / C_d * Sum_j { |W_n(s_j)|^2 / s_j }
+
+        If self.mask_coi, each scale only contributes at times outside
+        its cone of influence.
         """
-        # TODO: consider applying upstream, inside wavelet_power
-        coi = self.wavelet.coi
         s = self.scales
-        t = self.time
-        T, S = np.meshgrid(t, s)
-        inside_coi = (coi(S) < T) & (T < (T.max() - coi(S)))
-        mask_power = np.ma.masked_where(~inside_coi, self.wavelet_power)
-        mask_mean = np.mean(mask_power, axis=axis)
-        return mask_mean
+        smin = s.min() if smin is None else smin
+        smax = s.max() if smax is None else smax
+        # time last
+        power = np.moveaxis(self.wavelet_power, self._time_axis, -1)
+        if self.unbias:
+            # the weighting by scale is done here
+            power = power * s.reshape((-1,) + (1,) * (power.ndim - 1))
+        first, last = self._coi_range()
+
+        total = np.zeros(power.shape[1:])
+        for j in np.flatnonzero((s >= smin) & (s <= smax)):
+            total[..., first[j]:last[j]] += \
+                power[j, ..., first[j]:last[j]] / s[j]
+        total = np.moveaxis(total, -1, self._time_axis - 1)
+        return total * self.dj * self.dt / self.C_d
 
     @property
     def C_d(self):
@@ -472,10 +801,11 @@ class WaveletTransform(object):
         C_d is scale independent and a constant for each wavelet
         function.
         """
-        if hasattr(self.wavelet, 'C_d'):
-            return self.wavelet.C_d
-        else:
-            return self.compute_Cdelta()
+        # computed over the scales, which can be set to any grid
+        scales = np.asarray(self.scales, dtype=float).tobytes()
+        return wavelet_constants.C_d(self.wavelet,
+                                     key=(self.dt, self.dj, self.N, scales),
+                                     compute=self.compute_Cdelta)
 
     def compute_Cdelta(self):
         """Compute the parameter C_delta (see self.C_d), used in
@@ -595,4 +925,52 @@ class WaveletTransform(object):
 
 WaveletAnalysis = WaveletTransform
 
+
+def multi_wavelet_transform(data, wavelets, bank=None, **kwargs):
+    """Transform one series with several wavelets at once.
+
+    The anomaly, variance and forward fft of `data` are computed once
+    and shared by every wavelet; wavelets of the same class and
+    parameters are only transformed once.
+
+    Arguments:
+        data - input signal, as for WaveletTransform
+        wavelets - sequence of wavelet instances
+        bank - KernelBank to take the filters from (default the
+               process wide kernel_bank)
+        kwargs - any other WaveletTransform arguments. The transform
+                 is always computed in frequency space.
+
+    Returns a list of WaveletTransform, one per entry of `wavelets`,
+    with the transform already computed. Duplicate wavelets map to
+    the same object.
+    """
+    import copy
+
+    kwargs['frequency'] = True
+    base = WaveletTransform(data, **kwargs)
+    axis = base.axis
+    real, _ = precisions[base.precision]
+    fft_data = get_backend().fft(base.anomaly_data.astype(real),
+                                 n=_padded_length(base.N), axis=axis)
+
+    unique = {}
+    for wavelet in wavelets:
+        unique.setdefault(_wavelet_key(wavelet), wavelet)
+
+    def transform(wavelet):
+        wt = copy.copy(base)
+        wt.wavelet = wavelet
+        W = cwt_freq(wt.anomaly_data, wavelet.frequency, wt.scales,
+                     wt.dt, axis, bank=bank, fft_data=fft_data,
+                     precision=wt.precision)
+        W.setflags(write=False)
+        wt._transform_cache = (wt._transform_key(), W)
+        return wt
+
+    # wavelets spread according to the execution policy
+    transforms = dict(zip(unique, get_policy().map(transform,
+                                                   unique.values())))
+    return [transforms[_wavelet_key(wavelet)] for wavelet in wavelets]
+
 # TODO: derive C_d for given wavelet
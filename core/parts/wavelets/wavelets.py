@@ -5,10 +5,12 @@ import scipy
 import scipy.signal
 import scipy.optimize
 import scipy.special
-from scipy.misc import factorial
+from scipy.special import factorial
+
+from .kernels import _wavelet_key
 
 # __all__ = ['Morlet', 'Paul', 'DOG', 'Ricker']
-__all__ = ['DOG', 'Morlet', 'Paul', 'Ricker', 'Ricker']
+__all__ = ['DOG', 'Morlet', 'Paul', 'Ricker']
 
 class Morlet(object):
     def __init__(self, w0=6):
@@ -119,6 +121,9 @@ class Paul(object):
     def __init__(self, m=4):
         """Initialise a Paul wavelet function of order m.
         """
+        if m == 4:
+            # value of C_d from TC98
+            self.C_d = 1.132
         self.m = m
 
     def __call__(self, *args, **kwargs):
@@ -188,7 +193,9 @@ class Paul(object):
         # prefactor
         const = 2 ** m / (m * factorial(2 * m - 1)) ** .5
 
-        functional_form = Hw * (x) ** m * np.exp(-x)
+        # only evaluate the exponential where the heaviside is on,
+        # exp(-x) overflows for large negative x
+        functional_form = Hw * (x) ** m * np.exp(-x * Hw)
 
         output = const * functional_form
 
@@ -335,4 +342,88 @@ class Ricker(DOG):
 Marr = Ricker
 Mexican_hat = Ricker
 
-all_wavelets = [Morlet, DOG, Paul, Ricker, Ricker]
\ No newline at end of file
+all_wavelets = [Morlet, DOG, Paul, Ricker]
+
+
+class WaveletConstants(object):
+    """Registry of the constants of each wavelet (class and
+    parameters), computed once per process.
+
+    - fourier_factor: the equivalent fourier period at unit scale.
+      For all the wavelets here the period is proportional to the
+      scale, so this gives s0 in closed form, without fsolve.
+    - s0: the smallest resolvable scale for a given dt
+    - scales: the optimal scale grid for a given N, dt, dj (and s0)
+    - C_d: the reconstruction constant, from TC98 where tabulated
+
+    Returned arrays are shared and so read only.
+    """
+    def __init__(self):
+        self._cache = {}
+
+    def clear(self):
+        self._cache.clear()
+
+    def _get(self, key, compute):
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = compute()
+            return value
+
+    def fourier_factor(self, wavelet):
+        """Ratio of equivalent fourier period to scale, or None if
+        the wavelet's period isn't proportional to scale."""
+        def compute():
+            p1 = wavelet.fourier_period(1.)
+            p2 = wavelet.fourier_period(2.)
+            if np.isclose(p2, 2 * p1):
+                return p1
+            return None
+
+        return self._get(('fourier_factor', _wavelet_key(wavelet)),
+                         compute)
+
+    def s0(self, wavelet, dt):
+        """Smallest resolvable scale: the scale at which the
+        equivalent fourier period is 2 * dt."""
+        def compute():
+            factor = self.fourier_factor(wavelet)
+            if factor is not None:
+                return 2 * dt / factor
+
+            def f(s):
+                return wavelet.fourier_period(s) - 2 * dt
+            return scipy.optimize.fsolve(f, 1)[0]
+
+        return self._get(('s0', _wavelet_key(wavelet), dt), compute)
+
+    def scales(self, wavelet, N, dt, dj, s0=None):
+        """Optimal scales s_j = s0 * 2 ** (j * dj) up to the largest
+        that fits in N * dt, see
+        WaveletTransform.compute_optimal_scales."""
+        if s0 is None:
+            s0 = self.s0(wavelet, dt)
+
+        def compute():
+            J = int((1 / dj) * np.log2(N * dt / s0))
+            sj = s0 * 2 ** (dj * np.arange(0, J + 1))
+            sj.setflags(write=False)
+            return sj
+
+        return self._get(('scales', _wavelet_key(wavelet), N, dt, dj, s0),
+                         compute)
+
+    def C_d(self, wavelet, key=None, compute=None):
+        """Reconstruction constant: the tabulated value if the
+        wavelet has one, otherwise compute() cached under `key`, or
+        None if there is no compute."""
+        if hasattr(wavelet, 'C_d'):
+            return wavelet.C_d
+        if compute is None:
+            return None
+        return self._get(('C_d', _wavelet_key(wavelet), key), compute)
+
+
+# process wide registry used by WaveletTransform
+wavelet_constants = WaveletConstants()
\ No newline at end of file
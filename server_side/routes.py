@@ -98,9 +98,9 @@ def show_wavelets():
     # wavelet_image_name.append(Image('hurst_plot', hurst_plot))
     # calculateHurst(date, x, hurst_plot)
 
-    # lyapunov_plot = common_folder + folder_name + '/' + lyapunov_plot_name + '.png'
-    # wavelet_image_name.append(Image('lyapunov_plot', lyapunov_plot))
-    # calculateLyapunov(date, x, lyapunov_plot)
+    lyapunov_plot = common_folder + folder_name + '/' + lyapunov_plot_name + '.png'
+    wavelet_image_name.append(Image('lyapunov_plot', lyapunov_plot))
+    calculateLyapunov(date, x, lyapunov_plot)
 
 
     wavelet_list_retrieved = ["All"] + __all__
@@ -9,6 +9,7 @@ from scipy.io import wavfile
 
 from core.parts import wavelets
 from core.parts.wavelets import WaveletAnalysis
+from core.parts.wavelets.transform import cwt_freq
 
 __all__ = ['test_N', 'compare_cwt', 'compare_morlet', 'test_Cd',
            'test_var_time', 'test_var_freq', 'test_reconstruction_time',
@@ -381,6 +382,606 @@ def test_multi_dim_axis_nd_time():
                                   decimal=13)
 
 
+def test_transform_cache():
+    """The transform is computed once and recomputed only when the
+    scales change or the cache is cleared."""
+    wa = WaveletAnalysis(anomaly_sst, time=nino_time, dt=nino_dt,
+                         frequency=True)
+    W = wa.wavelet_transform
+    assert(wa.wavelet_transform is W)
+    assert(not W.flags.writeable)
+
+    wa.scales = wa.scales[:10]
+    assert(wa.wavelet_transform.shape == (10, anomaly_sst.size))
+
+    W = wa.wavelet_transform
+    wa.clear_cache()
+    assert(wa.compute() is not W)
+    npt.assert_array_equal(wa.compute(), W)
+
+    # setting the anomaly discards the cached transform
+    wa.anomaly_data = 2 * wa.anomaly_data
+    npt.assert_array_almost_equal(wa.wavelet_transform, 2 * W)
+
+
+def test_kernel_bank():
+    """Filters are reused between series with the same length, dt
+    and scales and the bank never grows beyond its cap."""
+    bank = wavelets.KernelBank()
+    morlet = wavelets.Morlet()
+    widths = wa.scales
+    x = np.random.random(wa.N)
+
+    first = cwt_freq(x, morlet.frequency, widths, 1, -1, bank=bank)
+    second = cwt_freq(x, wavelets.Morlet().frequency, widths, 1, -1,
+                      bank=bank)
+    npt.assert_array_equal(first, second)
+    assert_equal(bank.stats()['hits'], 1)
+    assert_equal(bank.stats()['misses'], 1)
+
+    small = wavelets.KernelBank()
+    small.max_bytes = small.filters(morlet.frequency, widths, 512, 1).nbytes
+    small.filters(morlet.frequency, widths[:-1], 512, 1)
+    assert_equal(len(small), 1)
+    assert(small.nbytes <= small.max_bytes)
+
+
+def test_multi_wavelet_transform():
+    """Sharing the forward fft gives the same power as separate
+    transforms, and duplicate wavelets are only computed once."""
+    family = [wavelets.Morlet(), wavelets.Paul(), wavelets.DOG(),
+              wavelets.Ricker(), wavelets.Ricker()]
+    transforms = wavelets.multi_wavelet_transform(anomaly_sst, family,
+                                                  dt=nino_dt)
+    assert_equal(len(transforms), len(family))
+    assert(transforms[3] is transforms[4])
+
+    for wavelet, wt in zip(family, transforms):
+        single = WaveletAnalysis(anomaly_sst, dt=nino_dt, wavelet=wavelet,
+                                 frequency=True)
+        npt.assert_array_almost_equal(wt.wavelet_power,
+                                      single.wavelet_power, decimal=13)
+
+
+def test_batch_wavelet_power():
+    """Batched power matches the single series power, whatever the
+    block size, and masked samples come back as NaN."""
+    data = np.random.random((5, 200))
+    scales, power = wavelets.batch_wavelet_power(data, max_bytes=1)
+    assert_equal(power.shape, (5, len(scales), 200))
+
+    single = WaveletAnalysis(data[2], frequency=True)
+    npt.assert_array_almost_equal(power[2], single.wavelet_power,
+                                  decimal=13)
+
+    mask = np.ones(data.shape, dtype=bool)
+    mask[1, :20] = False
+    scales, power = wavelets.batch_wavelet_power(data, mask=mask)
+    assert(np.isnan(power[1, :, :20]).all())
+    assert(not np.isnan(power[1, :, 20:]).any())
+    npt.assert_array_almost_equal(power[2], single.wavelet_power,
+                                  decimal=13)
+
+
+def test_streaming_transform():
+    """Appending samples one at a time reproduces the power of the
+    whole series away from the edges, recomputing only the trailing
+    columns."""
+    data = np.cumsum(np.random.randn(1200))
+    stream = wavelets.StreamingWaveletTransform(data[:800])
+    assert_less(stream.reach.max(), 800 // 4 + 1)
+    firsts = [stream.append(value) for value in data[800:]]
+    assert_equal(stream.wavelet_power.shape, (len(stream.scales), 1200))
+    assert_equal(firsts[-1], 1199 - stream.reach.max())
+    assert(min(firsts) > 0)
+
+    full = WaveletAnalysis(data, frequency=True)
+    full.scales = stream.scales
+    # same anomaly as the stream
+    full.anomaly_data = data - data[:800].mean()
+
+    inside = slice(None, -stream.reach.max())
+    error = np.abs(stream.wavelet_power - full.wavelet_power)[:, inside]
+    assert_less(error.max() / full.wavelet_power.max(), 1e-2)
+
+    # a short history keeps the smallest scales; a given bank is used
+    # even when empty
+    bank = wavelets.KernelBank()
+    short = wavelets.StreamingWaveletTransform(data[:64], bank=bank)
+    assert(short.bank is bank)
+    assert(len(short.scales) > 0)
+    assert_equal(short.reach.max(), 32)
+    short.append(data[64:70])
+    assert_equal(short.wavelet_power.shape, (len(short.scales), 70))
+
+
+def test_chunked_power():
+    """Chunked power, in memory or memory mapped, equals the power of
+    the full transform."""
+    import os
+    import tempfile
+
+    wa = WaveletAnalysis(anomaly_sst, time=nino_time, dt=nino_dt,
+                         frequency=True, unbias=True)
+    power = wa.chunked_power(max_bytes=1)
+    npt.assert_array_almost_equal(power, wa.wavelet_power, decimal=13)
+
+    path = os.path.join(tempfile.mkdtemp(), 'power.npy')
+    wa.chunked_power(out=path)
+    npt.assert_array_almost_equal(np.load(path), wa.wavelet_power,
+                                  decimal=13)
+
+    # in time, with blocks and kernel segments much shorter than the
+    # largest kernels
+    wa = WaveletAnalysis(anomaly_sst, time=nino_time, dt=nino_dt)
+    power = wa.chunked_power(max_bytes=128 * 8 * 16)
+    npt.assert_array_almost_equal(power, wa.wavelet_power, decimal=12)
+
+
+def test_single_precision():
+    """Single precision power is float32 and within 1e-5 of the peak
+    of the double precision power."""
+    double = WaveletAnalysis(anomaly_sst, time=nino_time, dt=nino_dt,
+                             frequency=True)
+    single = WaveletAnalysis(anomaly_sst, time=nino_time, dt=nino_dt,
+                             frequency=True, precision='single')
+    assert_equal(single.wavelet_transform.dtype, np.complex64)
+    assert_equal(single.wavelet_power.dtype, np.float32)
+
+    error = np.abs(single.wavelet_power - double.wavelet_power).max()
+    assert_less(error / double.wavelet_power.max(), 1e-5)
+
+
+def test_fused_power():
+    """Power-only transform and its reductions match the power of
+    the complex transform."""
+    wa = WaveletAnalysis(anomaly_sst, time=nino_time, dt=nino_dt,
+                         frequency=True, unbias=True)
+    power = wa.wavelet_power
+    npt.assert_array_almost_equal(wa.fused_power(block=5), power,
+                                  decimal=12)
+    npt.assert_array_almost_equal(wa.fused_power('scales'),
+                                  power.sum(axis=0), decimal=10)
+    npt.assert_array_almost_equal(wa.fused_power('time'),
+                                  power.mean(axis=1), decimal=12)
+
+
+def test_cwt_time_overlap_save():
+    """The overlap-save time domain transform gives the same result
+    as direct fft convolution, also for kernels longer than the
+    data."""
+    data = np.random.random(150)
+    morlet = wavelets.Morlet().time
+    widths = np.array([0.5, 2, 10, 40, 100])
+
+    W = wavelets.cwt(data, morlet, widths)
+    for ind, width in enumerate(widths):
+        M = 10 * width
+        t = np.arange((-M + 1) / 2., (M + 1) / 2.)
+        kernel = width ** -.5 * morlet(t, width)
+        direct = scipy.signal.fftconvolve(data, kernel, mode='same')
+        npt.assert_array_almost_equal(W[ind], direct, decimal=12)
+
+
+def test_fft_backend():
+    """Backends and real ffts agree; fast padding is never longer
+    than a power of two and is reported."""
+    default = wavelets.get_backend()
+    try:
+        reference = WaveletAnalysis(anomaly_sst, frequency=True)
+        for name in ('numpy', 'scipy'):
+            for real in (True, False):
+                wavelets.set_backend(name, real=real)
+                wa = WaveletAnalysis(anomaly_sst, frequency=True)
+                npt.assert_array_almost_equal(wa.wavelet_power,
+                                              reference.wavelet_power,
+                                              decimal=12)
+
+        backend = wavelets.set_backend('numpy', padding='fast')
+        assert_equal(backend.padded_length(9620), 9720)
+        WaveletAnalysis(anomaly_sst, frequency=True).wavelet_power
+        assert((anomaly_sst.size, 1536) in backend.report()['sizes'])
+
+        # the kernel blocks of a transform in time are counted apart
+        backend = wavelets.set_backend('numpy')
+        WaveletAnalysis(anomaly_sst[:300]).wavelet_power
+        report = backend.report()
+        assert_equal(report['sizes'], {})
+        assert(len(report['block_sizes']) > 0)
+    finally:
+        wavelets.backend._backend = default
+
+
+def test_wavelet_constants():
+    """Closed form s0 and the cached scales agree with fsolve and
+    compute_optimal_scales; the registry returns the same grid."""
+    for wavelet in (wavelets.Morlet(), wavelets.Paul(), wavelets.DOG(),
+                    wavelets.Ricker()):
+        wa = WaveletAnalysis(anomaly_sst, dt=nino_dt, wavelet=wavelet)
+        npt.assert_almost_equal(wa.s0, wa.find_s0(), 10)
+        npt.assert_array_almost_equal(wa.scales, wa.compute_optimal_scales(),
+                                      decimal=10)
+        assert(wa.scales is wa.scales)
+
+    assert_almost_equal(WaveletAnalysis(anomaly_sst,
+                                        wavelet=wavelets.Paul()).C_d, 1.132)
+
+    # the computed C_d follows the scales it is computed over
+    wa = WaveletAnalysis(anomaly_sst, dt=nino_dt, wavelet=wavelets.DOG(4))
+    full = wa.C_d
+    wa.scales = wa.scales[::2]
+    assert_almost_equal(wa.C_d, wa.compute_Cdelta())
+    assert(abs(wa.C_d - full) > 0.1)
+
+
+def test_coi_indices():
+    """The index based coi mean matches a masked mean over the times
+    outside the cone of influence."""
+    wa = WaveletAnalysis(anomaly_sst, time=nino_time, dt=nino_dt,
+                         frequency=True)
+    power = wa.wavelet_power
+
+    T, S = np.meshgrid(wa.time - wa.time.min(), wa.scales)
+    coi = wa.wavelet.coi(S)
+    inside = (coi < T) & (T < T.max() - coi)
+    masked = np.ma.masked_where(~inside, power).mean(axis=1)
+
+    mean = wa.coi_mean(power)
+    valid = ~np.ma.getmaskarray(masked)
+    npt.assert_array_almost_equal(mean[valid], masked[valid], decimal=12)
+    assert(np.isnan(mean[~valid]).all())
+
+    wa.mask_coi = True
+    npt.assert_array_almost_equal(wa.time_averaged_power(), mean,
+                                  decimal=12)
+    scale_average = (np.where(inside, power, 0).T / wa.scales).sum(axis=1)
+    npt.assert_array_almost_equal(wa.scale_averaged_power(),
+                                  scale_average * wa.dj * wa.dt / wa.C_d,
+                                  decimal=12)
+
+    # several series, time on either axis, match each series alone
+    data = np.vstack([anomaly_sst, anomaly_sst[::-1]])
+    for axis, stacked in ((-1, data), (0, data.T)):
+        nd = WaveletAnalysis(stacked, time=nino_time, dt=nino_dt,
+                             frequency=True, axis=axis, mask_coi=True)
+        time_average = nd.time_averaged_power()
+        scale_average = nd.scale_averaged_power()
+        assert_equal(scale_average.shape, stacked.shape)
+        for row, series in enumerate(data):
+            single = WaveletAnalysis(series, time=nino_time, dt=nino_dt,
+                                     frequency=True, mask_coi=True)
+            npt.assert_array_almost_equal(time_average[:, row],
+                                          single.time_averaged_power(),
+                                          decimal=12)
+            npt.assert_array_almost_equal(
+                np.take(scale_average, row, axis=1 + axis),
+                single.scale_averaged_power(), decimal=12)
+
+
+def test_coherence():
+    """A series is fully coherent and in phase with itself; a lagged
+    copy leads by the lag at all scales away from the edges."""
+    xwt = wavelets.CrossWaveletTransform(anomaly_sst, anomaly_sst,
+                                         dt=nino_dt)
+    W_x, W_y = xwt.wavelet_transforms
+    npt.assert_array_almost_equal(W_x, WaveletAnalysis(
+        anomaly_sst, dt=nino_dt, frequency=True).wavelet_transform)
+    npt.assert_array_almost_equal(xwt.coherence, 1, decimal=10)
+    npt.assert_array_almost_equal(xwt.phase, 0, decimal=10)
+    npt.assert_array_almost_equal(xwt.cross_power, np.abs(W_x) ** 2)
+
+    t = np.arange(2048)
+    x = np.sin(2 * np.pi * t / 64)
+    xwt = wavelets.CrossWaveletTransform(x, np.roll(x, 4))
+    scale = np.argmin(np.abs(xwt.fourier_periods - 64))
+    npt.assert_array_almost_equal(xwt.time_lag[scale, 256:-256], 4,
+                                  decimal=1)
+    assert(np.all(xwt.coherence[scale, 256:-256] > 0.99))
+
+    # smoothing doesn't wrap the end onto the start, whatever the length
+    for N in (2048, 2049):
+        impulse = np.zeros((2, N))
+        impulse[:, -1] = 1
+        smooth = wavelets.smooth_wavelet(impulse, np.array([2., 50.]))
+        assert_less(np.abs(smooth[:, :N // 2]).max(), 1e-12)
+    # a scale resolution coarser than the scale smoothing
+    coherence = wavelets.CrossWaveletTransform(x, np.roll(x, 4),
+                                               dj=1).coherence
+    assert(np.all(coherence[:, 256:-256] <= 1 + 1e-10))
+
+
+def test_band_correlation():
+    """Band signals match the reconstruction from the scales in the
+    band, and tiled band correlations match np.corrcoef of them."""
+    rng = np.random.RandomState(3)
+    data = np.cumsum(rng.randn(5, 512), axis=1)
+    bands = [(2, 16), (16, 64)]
+
+    signals = wavelets.band_signals(data, bands, dtype=float)
+    assert_equal(signals.shape, (5, 2, 512))
+    wa = WaveletAnalysis(data[2], frequency=True)
+    inside = (wa.fourier_periods >= 16) & (wa.fourier_periods < 64)
+    band = wa.reconstruction(scales=wa.scales[inside]) - data[2].mean()
+    npt.assert_array_almost_equal(signals[2, 1], band, decimal=10)
+
+    corr = wavelets.band_correlation(signals=signals, block=2)
+    for b in range(2):
+        npt.assert_array_almost_equal(corr[b], np.corrcoef(signals[:, b]),
+                                      decimal=12)
+
+
+def test_significance():
+    """Monte carlo red noise levels agree with the chi-square levels,
+    and do not depend on the number of processes."""
+    wa = WaveletAnalysis(anomaly_sst, dt=nino_dt, frequency=True)
+    analytic = wavelets.significance_levels(wa)
+    mask = wavelets.significance_mask(wa)
+    assert_equal(mask.shape, wa.wavelet_power.shape)
+    npt.assert_array_equal(mask, wa.wavelet_power > analytic[:, None])
+
+    simulated = wavelets.significance_levels(wa, method='monte_carlo',
+                                             surrogates=200)
+    npt.assert_allclose(simulated[3:50], analytic[3:50], rtol=0.2)
+
+    parallel = wavelets.significance_levels(wa, method='monte_carlo',
+                                            surrogates=200, processes=2)
+    npt.assert_array_equal(parallel, simulated)
+
+
+def test_execution_policy():
+    """Thread and process pools give results identical to serial."""
+    default = wavelets.get_policy()
+    rng = np.random.RandomState(4)
+    data = rng.randn(6, 700)
+    wa = WaveletAnalysis(anomaly_sst, dt=nino_dt)
+    serial = (wa.wavelet_transform.copy(),
+              [wt.wavelet_transform for wt in wavelets.multi_wavelet_transform(
+                  anomaly_sst, [wavelets.Morlet(), wavelets.Paul()])],
+              wavelets.batch_wavelet_power(data)[1])
+    try:
+        for kind in ('thread', 'process'):
+            wavelets.set_policy(kind, workers=3)
+            wa.clear_cache()
+            npt.assert_array_equal(wa.wavelet_transform, serial[0])
+            transforms = wavelets.multi_wavelet_transform(
+                anomaly_sst, [wavelets.Morlet(), wavelets.Paul()])
+            for wt, W in zip(transforms, serial[1]):
+                npt.assert_array_equal(wt.wavelet_transform, W)
+            npt.assert_array_equal(wavelets.batch_wavelet_power(data)[1],
+                                   serial[2])
+    finally:
+        wavelets.executor._policy = default
+
+
+def test_modwt():
+    """MODWT keeps the energy of the data, matches pywt.swt up to a
+    circular shift, and both multiresolution analyses sum to the
+    data at its original length."""
+    import pywt
+    from core.parts.processing import dwt
+
+    rng = np.random.RandomState(5)
+    x = np.cumsum(rng.randn(3, 1000), axis=1)
+    W = dwt.modwt(x, 'db2', level=4)
+    assert_equal(W.shape, (3, 5, 1000))
+    npt.assert_allclose((W ** 2).sum(axis=(1, 2)), (x ** 2).sum(axis=1))
+    npt.assert_array_almost_equal(dwt.modwt_mra(x, 'db2', 4).sum(axis=1), x)
+    npt.assert_array_almost_equal(dwt.dwt_mra(x, 'coif2', 3).sum(axis=1), x)
+    assert_equal(dwt.dwt_smooth(x[0, :999], 'haar').shape, (999,))
+
+    swt = pywt.swt(x[0, :512], 'db2', level=1, norm=True)[0][1]
+    W_1 = dwt.modwt(x[0, :512], 'db2', level=1)[0]
+    assert(min(np.abs(np.roll(W_1, k) - swt).max()
+               for k in range(-4, 5)) < 1e-12)
+
+
+def test_streaming_denoiser():
+    """Without thresholding the denoiser gives back its input; with it,
+    a noisy cycle comes out closer to the clean one and the noise
+    level is estimated on line."""
+    from core.parts.processing.denoise import StreamingDenoiser
+
+    rng = np.random.RandomState(6)
+    t = np.arange(4000)
+    clean = 3 * np.sin(2 * np.pi * t / 400)
+    noisy = clean + 0.5 * rng.randn(t.size)
+
+    npt.assert_array_almost_equal(StreamingDenoiser(k=0).extend(noisy),
+                                  noisy, decimal=12)
+    denoiser = StreamingDenoiser()
+    denoised = denoiser.extend(noisy)
+    assert_less(np.std(denoised[500:] - clean[500:]),
+                0.6 * np.std(noisy[500:] - clean[500:]))
+    npt.assert_allclose(denoiser.noise_sigma, 0.5, rtol=0.1)
+
+
+def test_wavelet_features():
+    """Features match explicit sums over the scales in each band."""
+    wa = WaveletAnalysis(anomaly_sst, time=nino_time, dt=nino_dt,
+                         frequency=True)
+    power = wa.wavelet_power
+    periods = wa.fourier_periods
+    frame = wavelets.wavelet_features(power, periods, [(2, 8)],
+                                      index=wa.time)
+    assert_equal(list(frame.columns), ['power', 'band_2_8', 'band_2_8_share',
+                                       'dominant_period'])
+    assert(all(frame.dtypes == np.float32))
+
+    inside = (periods >= 2) & (periods < 8)
+    npt.assert_allclose(frame['power'], power.sum(axis=0), rtol=1e-6)
+    npt.assert_allclose(frame['band_2_8'], power[inside].sum(axis=0),
+                        rtol=1e-6)
+    npt.assert_allclose(frame['band_2_8_share'],
+                        power[inside].sum(axis=0) / power.sum(axis=0),
+                        rtol=1e-6)
+    npt.assert_allclose(frame['dominant_period'],
+                        periods[power.argmax(axis=0)], rtol=1e-6)
+    npt.assert_allclose(wavelets.normalised_spectrum(power).sum(axis=0), 1)
+
+
+def test_ridges():
+    """Peaks found a block of scales at a time are the local maxima of
+    the whole spectrum, and a drifting cycle stays on one ridge."""
+    from core.parts.wavelets.ridges import _scale_blocks
+
+    rng = np.random.RandomState(7)
+    power = rng.rand(37, 200)
+    padded = np.vstack([np.full((1, 200), -np.inf), power,
+                        np.full((1, 200), -np.inf)])
+    peaks = np.where((power >= padded[:-2]) & (power > padded[2:]), power,
+                     -np.inf)
+    top = np.argsort(-peaks, axis=0)[:3]
+    for block in (1, 5, 40):
+        index, value = wavelets.ridge_peaks(_scale_blocks(power, block),
+                                            37, 200, k=3)
+        npt.assert_array_equal(index, top)
+        npt.assert_array_equal(value, np.take_along_axis(peaks, top, axis=0))
+
+    t = np.arange(3000)
+    x = (np.sin(2 * np.pi * t / (40 + t / 100.))
+         + 0.5 * np.sin(2 * np.pi * t / 300))
+    ridges = WaveletAnalysis(x, frequency=True).ridges(k=2)
+    assert_equal(ridges['period'].dtype, np.float32)
+    npt.assert_array_equal(ridges['ridge'], [[0] * 3000, [1] * 3000])
+    # instantaneous period of the chirp
+    npt.assert_allclose(ridges['period'][1, 500:2500:500],
+                        (40 + t[500:2500:500] / 100.) ** 2 / 40, rtol=0.1)
+
+    # in time, a scale at a time, as from the whole power
+    wa = WaveletAnalysis(x[:600])
+    ridges = wa.ridges(k=2)
+    whole = wavelets.wavelet_ridges(wa.wavelet_power, wa.fourier_periods,
+                                    600, k=2)
+    for name in ('period', 'power', 'ridge'):
+        npt.assert_allclose(ridges[name], whole[name], rtol=1e-5)
+
+
+def test_rolling_hurst():
+    """Running sum rolling Hurst matches a per window polyfit of the
+    lagged difference spreads."""
+    from core.parts.processing.rolling import rolling_hurst
+
+    rng = np.random.RandomState(8)
+    x = np.cumsum(rng.randn(600)) + 100
+    for window in (7, 30, 70):
+        expected = np.zeros(x.size)
+        lags = np.arange(1, window // 2)
+        for tail in range(window, x.size):
+            w = x[tail - window:tail]
+            tau = [np.sqrt(np.std(w[lag:] - w[:-lag])) for lag in lags]
+            expected[tail] = 2 * np.polyfit(np.log(lags), np.log(tau), 1)[0]
+        npt.assert_array_almost_equal(rolling_hurst(x, window), expected,
+                                      decimal=10)
+    # too short for two default lags
+    npt.assert_raises(ValueError, rolling_hurst, x, 5)
+
+
+def test_rolling_dfa():
+    """Rolling DFA from cumulative sums matches nolds.dfa with a least
+    squares fit, window by window and across chunks."""
+    import nolds
+    from core.parts.processing.rolling import rolling_dfa
+
+    rng = np.random.RandomState(9)
+    x = np.cumsum(rng.randn(1200)) * 0.01 + 1.3
+    for window in (70, 250):
+        dfa = rolling_dfa(x, window, chunk=300)
+        assert_equal(dfa.shape, x.shape)
+        for tail in range(window, x.size, 97):
+            assert_almost_equal(dfa[tail],
+                                nolds.dfa(x[tail - window:tail],
+                                          fit_exp='poly'), places=9)
+
+    # a flat stretch has no exponent, not one fitted to rounding errors
+    x[500:700] = x[499]
+    dfa = rolling_dfa(x, 70, chunk=300)
+    assert np.isnan(dfa[570:700]).all()
+    assert np.isfinite(dfa[70:560]).all() and np.isfinite(dfa[770:]).all()
+    assert np.nanmax(np.abs(dfa)) < 3
+
+
+def test_hurst_surface():
+    """Each row of the multi window surface matches the single window
+    engine, whatever the chunking."""
+    from core.parts.processing.rolling import (hurst_surface, rolling_dfa,
+                                               rolling_hurst)
+
+    rng = np.random.RandomState(10)
+    x = np.cumsum(rng.randn(5000)) * 0.01 + 1.3
+    windows = (30, 70, 250, 1000)
+    dfa = hurst_surface(x, windows, chunk=700)
+    hurst = hurst_surface(x, windows, method='hurst', chunk=1100)
+    assert_equal(dfa.shape, (4, 5000))
+    for row, window in enumerate(windows):
+        npt.assert_array_almost_equal(dfa[row], rolling_dfa(x, window),
+                                      decimal=9)
+        npt.assert_array_almost_equal(hurst[row], rolling_hurst(x, window),
+                                      decimal=9)
+
+
+def test_wavelet_hurst():
+    """The wavelet variance exponent is on the scale of the DFA one, and
+    each rolling value only depends on its window."""
+    from core.parts.processing.rolling import (rolling_wavelet_hurst,
+                                               wavelet_hurst)
+
+    rng = np.random.RandomState(11)
+    noise = rng.randn(20000)
+    walk = np.cumsum(noise)
+    assert abs(wavelet_hurst(noise) - 0.5) < 0.05
+    assert abs(wavelet_hurst(walk) - 1.5) < 0.05
+    assert abs(wavelet_hurst(walk, 'db4') - 1.5) < 0.05
+
+    window = 250
+    rolling = rolling_wavelet_hurst(walk[:3000], window)
+    npt.assert_array_equal(rolling[:window], 0)
+    for i in (window, 1000, 2999):
+        alone = rolling_wavelet_hurst(walk[i - window:i + 1] + 5, window)
+        npt.assert_almost_equal(rolling[i], alone[window], decimal=9)
+    assert abs(rolling_wavelet_hurst(noise, window)[window:].mean()
+               - 0.5) < 0.05
+
+
+def test_lyapunov():
+    """The Rosenstein estimate matches nolds, whichever neighbour
+    search is used, and recovers ln 2 for the logistic map at r = 4."""
+    import nolds
+    from core.parts.processing.lyapunov import (_neighbours,
+                                                delay_embedding, lyapunov_r,
+                                                mean_period, rolling_lyapunov)
+
+    rng = np.random.RandomState(12)
+    walk = np.cumsum(rng.randn(1500))
+    npt.assert_almost_equal(
+        lyapunov_r(walk, min_tsep=20),
+        nolds.lyap_r(walk, lag=1, min_tsep=20, fit='poly'), decimal=6)
+    orbit = delay_embedding(walk, 10)
+    npt.assert_array_equal(_neighbours(orbit, 20),
+                           _neighbours(orbit, 20, brute_force=0))
+    # the default Theiler window is the mean period, below its cap
+    wave = np.sin(0.3 * np.arange(800)) + 0.1 * rng.randn(800)
+    assert mean_period(wave) < 800 // 4
+    for series in (walk, wave, rng.randn(600)):
+        npt.assert_almost_equal(lyapunov_r(series),
+                                nolds.lyap_r(series, lag=1, fit='poly'),
+                                decimal=6)
+
+    x = np.empty(20000)
+    x[0] = 0.1
+    for t in range(1, x.size):
+        x[t] = 4 * x[t - 1] * (1 - x[t - 1])
+    assert abs(lyapunov_r(x, emb_dim=2, min_tsep=10, trajectory_len=4)
+               - np.log(2)) < 0.01
+
+    window = 250
+    rolling = rolling_lyapunov(walk[:600], window)
+    npt.assert_array_equal(rolling[:window], 0)
+    npt.assert_almost_equal(rolling[400], lyapunov_r(walk[150:400]))
+    sparse = rolling_lyapunov(walk[:600], window, step=10)
+    npt.assert_array_equal(sparse[window::10], rolling[window::10])
+    npt.assert_array_equal(sparse[window + 5], rolling[window])
+
+
 def analyse_song():
     """Compute the wavelet transform of a song."""
     fs, song = wavfile.read('alarma.wav')
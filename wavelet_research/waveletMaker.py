@@ -1,7 +1,8 @@
 import math
 
 from core.parts.processing.indexes import *
-from core.parts.wavelets.transform import WaveletAnalysis
+from core.parts.wavelets.features import wavelet_features
+from core.parts.wavelets.transform import WaveletAnalysis, multi_wavelet_transform
 from core.parts.wavelets.wavelets import all_wavelets
 
 common_folder = 'static/results/'
@@ -22,10 +23,11 @@ def countWaveletTransform(date, x):
         wavelets = []
         data = []
 
-        for wavelet in all_wavelets:
-            wa = WaveletAnalysis(data=x, wavelet=wavelet())
+        # one forward fft of x shared by all the wavelets
+        transforms = multi_wavelet_transform(x, [wavelet() for wavelet in all_wavelets])
+        for wavelet, wa in zip(all_wavelets, transforms):
             power = wa.wavelet_power
-            scales = wa.compute_optimal_scales()
+            scales = wa.scales
 
             wavelets.append(wavelet.__name__)
             data.append([date, scales, power])
@@ -48,12 +50,23 @@ def flatWaveletTransform(wavelets: dict):
 
 
 def flatMatrix(matrix):
-    vector = np.zeros(len(matrix[0]))
-    for row in matrix:
-        for key, value in enumerate(row):
-            vector[key] += value
-    #todo normalize
-    return vector
+    # power summed over scales
+    return np.asarray(matrix, dtype=float).sum(axis=0)
+
+
+def waveletFeatures(wavelets: dict, bands=((2, 8), (8, 32), (32, 128)), index=None):
+    # float32 band and dominant period features of every wavelet, one frame
+    # with columns <wavelet>_<feature> (see wavelet_features), to join to the
+    # time series; the summed power is flatWaveletTransform's
+    import pandas as pd
+
+    features = []
+    for name in wavelets:
+        _, scales, power = wavelets[name]
+        wavelet = next(w for w in all_wavelets if w.__name__ == name)()
+        frame = wavelet_features(power, wavelet.fourier_period(scales), bands, index=index)
+        features.append(frame.drop(columns="power").add_prefix(name + "_"))
+    return pd.concat(features, axis=1)
 
 
 # hurst_res = hurst(x)